@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+DEFAULT_MEMORY_PATH = Path(__file__).resolve().parent / ".cache" / "answer_memory.sqlite"
+DEFAULT_MIN_OBSERVATIONS = 2
+MAX_REMEMBERED_TEXT_CHARS = 200
+# Free-text answers are job-specific; only short, reusable field types are remembered.
+REMEMBERED_FIELD_TYPES = {"select", "radio_group", "checkbox_group", "checkbox", "url", "text", "email", "tel"}
+
+
+def normalize_question(text: str) -> str:
+    text = (text or "").lower().replace("*", " ")
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def question_signature(field: dict) -> str:
+    signature = {
+        "question": normalize_question(field.get("question") or ""),
+        "field_type": field.get("field_type") or "",
+        "options": sorted(normalize_question(option) for option in field.get("options") or []),
+    }
+    return hashlib.sha256(json.dumps(signature, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def context_hash(profile_text: str, resume_text: str) -> str:
+    return hashlib.sha256(f"{profile_text}\0{resume_text}".encode("utf-8")).hexdigest()
+
+
+def _is_rememberable(field: dict, value) -> bool:
+    if field.get("field_type") not in REMEMBERED_FIELD_TYPES:
+        return False
+    if not normalize_question(field.get("question") or ""):
+        return False
+    if value in (None, "", []):
+        return False
+    if isinstance(value, str) and len(value) > MAX_REMEMBERED_TEXT_CHARS:
+        return False
+    return True
+
+
+class AnswerMemory:
+    def __init__(self, path: Path | str = DEFAULT_MEMORY_PATH, min_observations: int = DEFAULT_MIN_OBSERVATIONS):
+        self.min_observations = max(1, int(min_observations))
+        self.lock = threading.Lock()
+        db_path = Path(path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "signature TEXT NOT NULL, context TEXT NOT NULL, question TEXT NOT NULL, value TEXT NOT NULL, "
+            "observations INTEGER NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (signature, context))"
+        )
+        self.db.commit()
+
+    def lookup(self, field: dict, context: str):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value, observations FROM answers WHERE signature = ? AND context = ?",
+                (question_signature(field), context),
+            ).fetchone()
+        if not row or row[1] < self.min_observations:
+            return None
+        return json.loads(row[0])
+
+    def observe(self, field: dict, value, context: str):
+        if not _is_rememberable(field, value):
+            return
+        signature = question_signature(field)
+        encoded = json.dumps(value, ensure_ascii=False, sort_keys=True)
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value, observations FROM answers WHERE signature = ? AND context = ?", (signature, context)
+            ).fetchone()
+            # A conflicting answer resets confidence instead of averaging it.
+            observations = row[1] + 1 if row and row[0] == encoded else 1
+            self.db.execute(
+                "INSERT OR REPLACE INTO answers (signature, context, question, value, observations, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (signature, context, field.get("question") or "", encoded, observations, time.time()),
+            )
+            self.db.commit()
+
+    def resolve(self, fields: list, context: str) -> dict:
+        resolved = {}
+        for index, field in enumerate(fields):
+            if field.get("field_type") not in REMEMBERED_FIELD_TYPES:
+                continue
+            value = self.lookup(field, context)
+            if value is not None:
+                resolved[index] = value
+        return resolved
+
+    def stats(self) -> dict:
+        with self.lock:
+            total, confident = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(observations >= ?), 0) FROM answers", (self.min_observations,)
+            ).fetchone()
+        return {"answers": total, "confident": confident, "min_observations": self.min_observations}
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+import asyncio
+import copy
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from urllib.parse import urlparse
+
+from batch_runner import parse_batch_urls
+from browser_pool import DEFAULT_POOL_SIZE
+from metrics import RequestTiming, timed
+from pipeline_api import (
+    METRICS_CONTENT_TYPE,
+    PipelineError,
+    attach_resources,
+    batch_item_event,
+    cache_report,
+    cancel_prefetch,
+    fill_fields,
+    health_payload,
+    job_response,
+    llm_error_status,
+    load_fields,
+    pipeline_key,
+    read_context,
+    release_resources,
+    submit_job,
+    submit_prefetch,
+)
+from prefetch import interactive
+
+
+DEFAULT_LLM_CONCURRENCY = 4
+DEFAULT_QUEUE_SIZE = 16
+MAX_BODY_BYTES = 1024 * 1024
+STATUS_TEXT = {
+    200: "OK",
+    202: "Accepted",
+    204: "No Content",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+}
+
+
+class AsyncPipelineServer:
+    # Stage work stays on the existing sync pipeline functions; the event loop
+    # only owns admission, per-stage concurrency and socket I/O.
+    def __init__(self, extract_concurrency: int, llm_concurrency: int, queue_size: int):
+        self.extract_concurrency = max(1, int(extract_concurrency))
+        self.llm_concurrency = max(1, int(llm_concurrency))
+        self.queue_size = max(0, int(queue_size))
+        self.capacity = max(self.extract_concurrency, self.llm_concurrency)
+        self.extract_slots = asyncio.Semaphore(self.extract_concurrency)
+        self.llm_slots = asyncio.Semaphore(self.llm_concurrency)
+        self.extract_executor = ThreadPoolExecutor(self.extract_concurrency, thread_name_prefix="extract")
+        self.llm_executor = ThreadPoolExecutor(self.llm_concurrency, thread_name_prefix="llm")
+        self.admitted = 0
+        self.rejected = 0
+        self.durations = deque(maxlen=50)
+
+    def _retry_after(self) -> int:
+        average = sum(self.durations) / len(self.durations) if self.durations else 10.0
+        waves = (self.admitted - self.capacity + 1) / self.capacity
+        return max(1, math.ceil(average * max(waves, 1)))
+
+    def stats(self) -> dict:
+        return {
+            "extract_concurrency": self.extract_concurrency,
+            "llm_concurrency": self.llm_concurrency,
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+    async def _send(
+        self,
+        writer,
+        status: int,
+        body: bytes = b"",
+        content_type: str | None = None,
+        headers=None,
+        streaming: bool = False,
+    ):
+        lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+            f"Access-Control-Allow-Origin: {os.getenv('PIPELINE_CORS_ORIGIN', '*')}",
+            "Access-Control-Allow-Headers: Content-Type",
+            "Access-Control-Allow-Methods: POST, GET, DELETE, OPTIONS",
+            "Access-Control-Expose-Headers: X-Pipeline-Timing, Location",
+            "Connection: close",
+        ]
+        if content_type:
+            lines.append(f"Content-Type: {content_type}")
+        if not streaming and status != 204:
+            lines.append(f"Content-Length: {len(body)}")
+        for key, value in (headers or {}).items():
+            lines.append(f"{key}: {value}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _send_json(self, writer, status: int, payload: dict, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await self._send(writer, status, body, "application/json; charset=utf-8", headers)
+
+    async def _send_timed(self, writer, status: int, payload: dict, timing: RequestTiming, endpoint: str = "pipeline"):
+        with timing.span("response_write"):
+            await self._send_json(writer, status, payload, headers={"X-Pipeline-Timing": timing.header()})
+        self.metrics.record_request(timing, endpoint, status, payload.get("cache"))
+
+    async def _write_event(self, writer, payload: dict):
+        writer.write((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                return
+            method, target, _ = request_line.split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in {b"\r\n", b"\n", b""}:
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            content_length = int(headers.get("content-length") or 0)
+            if content_length > MAX_BODY_BYTES:
+                await self._send_json(writer, 413, {"error": "payload_too_large"})
+                return
+            body = await reader.readexactly(content_length) if content_length > 0 else b""
+            await self.dispatch(writer, method.upper(), urlparse(target).path, body)
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            writer.close()
+
+    async def dispatch(self, writer, method: str, path: str, body: bytes):
+        if method == "OPTIONS":
+            known = path in {"/pipeline", "/pipeline/batch", "/jobs", "/prefetch", "/health", "/metrics"}
+            known = known or path.startswith("/jobs/")
+            await self._send(writer, 204 if known else 404)
+            return
+        if method == "DELETE" and path == "/prefetch":
+            await self._send_json(writer, *cancel_prefetch(self))
+            return
+        if method == "GET" and path.startswith("/jobs/"):
+            await self._send_json(writer, *job_response(self, path))
+            return
+        if method == "GET" and path == "/health":
+            await self._send_json(writer, 200, {**health_payload(self), "admission": self.stats()})
+            return
+        if method == "GET" and path == "/metrics":
+            await self._send(writer, 200, self.metrics.render().encode("utf-8"), METRICS_CONTENT_TYPE)
+            return
+        if method != "POST" or path not in {"/pipeline", "/pipeline/batch", "/jobs", "/prefetch"}:
+            await self._send_json(writer, 404, {"error": "not_found"})
+            return
+
+        try:
+            payload = json.loads(body.decode("utf-8") or "{}")
+        except Exception as error:
+            await self._send_json(writer, 400, {"error": "bad_request", "detail": f"Invalid JSON body: {error}"})
+            return
+        if not isinstance(payload, dict):
+            await self._send_json(writer, 400, {"error": "bad_request", "detail": "Request body must be a JSON object."})
+            return
+        if path == "/jobs":
+            # Jobs queue on the scheduler's own bounded pool, not the admission queue.
+            await self._send_json(writer, *submit_job(self, payload))
+            return
+        if path == "/prefetch":
+            await self._send_json(writer, *submit_prefetch(self, payload))
+            return
+        if path == "/pipeline/batch":
+            try:
+                urls = parse_batch_urls(payload)
+            except ValueError as error:
+                await self._send_json(writer, 400, {"error": "bad_request", "detail": str(error)})
+                return
+            run = partial(self.run_batch, writer, urls, bool(payload.get("bypass_cache")))
+        else:
+            url = (payload.get("url") or "").strip()
+            if not url:
+                await self._send_json(writer, 400, {"error": "bad_request", "detail": "Missing 'url' in request body."})
+                return
+            run = partial(self.run_pipeline, writer, payload, url)
+
+        if self.admitted >= self.capacity + self.queue_size:
+            self.rejected += 1
+            self.metrics.inc("pipeline_requests_total", endpoint="pipeline", status=503)
+            retry_after = self._retry_after()
+            await self._send_json(
+                writer,
+                503,
+                {"error": "overloaded", "detail": "Pipeline admission queue is full.", "retry_after": retry_after},
+                headers={"Retry-After": str(retry_after)},
+            )
+            return
+
+        self.admitted += 1
+        started = time.monotonic()
+        try:
+            with interactive(self):
+                await run()
+        finally:
+            self.admitted -= 1
+            self.durations.append(time.monotonic() - started)
+
+    async def run_pipeline(self, writer, payload: dict, url: str):
+        bypass_cache = bool(payload.get("bypass_cache"))
+        stream = bool(payload.get("stream"))
+        timing = RequestTiming()
+        print(f"[async] {datetime.utcnow().isoformat()}Z pipeline url={url} admitted={self.admitted}")
+        try:
+            if stream:
+                await self._stream_pipeline(writer, url, bypass_cache, timing)
+                return
+            result = await self._run_coalesced(url, bypass_cache, timing)
+        except PipelineError as error:
+            await self._send_timed(writer, error.status, error.payload(), timing, "pipeline_stream" if stream else "pipeline")
+            return
+        await self._send_timed(writer, 200, result, timing)
+
+    async def run_batch(self, writer, urls: list, bypass_cache: bool):
+        # A batch is admitted once; its items share the stage slots with
+        # single requests, so a large batch can't starve them of browsers.
+        print(f"[async] {datetime.utcnow().isoformat()}Z batch urls={len(urls)} admitted={self.admitted}")
+        batch_timing = RequestTiming()
+        timings = [RequestTiming() for _ in urls]
+
+        async def run_item(index: int):
+            try:
+                return index, await self._run_staged(urls[index], bypass_cache, timings[index]), None
+            except Exception as error:
+                return index, None, error
+
+        await self._send(writer, 200, content_type="application/x-ndjson; charset=utf-8", streaming=True)
+        await self._write_event(writer, {"event": "batch", "count": len(urls)})
+        failed = 0
+        for completed in asyncio.as_completed([run_item(index) for index in range(len(urls))]):
+            index, result, error = await completed
+            event = batch_item_event(index, urls[index], result, error, timings[index])
+            failed += error is not None
+            self.metrics.record_request(timings[index], "pipeline_batch_item", event["status"], (result or {}).get("cache"))
+            await self._write_event(writer, event)
+
+        self.metrics.inc("pipeline_requests_total", endpoint="pipeline_batch", status=200)
+        summary = {"count": len(urls), "succeeded": len(urls) - failed, "failed": failed}
+        await self._write_event(writer, {"event": "done", **summary, "timing": batch_timing.header()})
+
+    async def _load_stage(self, url: str, bypass_cache: bool, timing: RequestTiming):
+        loop = asyncio.get_running_loop()
+        with timing.span("extract_queue"):
+            await self.extract_slots.acquire()
+        try:
+            try:
+                fields, form_cache_status, _ = await loop.run_in_executor(
+                    self.extract_executor, load_fields, self, url, bypass_cache, timing
+                )
+            except ValueError as error:
+                raise PipelineError(422, "invalid_url", str(error)) from error
+            except Exception as error:
+                raise PipelineError(422, "form_extraction_failed", str(error)) from error
+        finally:
+            self.extract_slots.release()
+        return fields, form_cache_status
+
+    async def _read_context(self, timing: RequestTiming) -> dict:
+        try:
+            # Usually an in-memory snapshot; at most a stat() per check interval.
+            return read_context(timing)
+        except OSError as error:
+            raise PipelineError(500, "context_read_failed", str(error)) from error
+
+    async def _run_staged(self, url: str, bypass_cache: bool, timing: RequestTiming) -> dict:
+        loop = asyncio.get_running_loop()
+        fields, form_cache_status = await self._load_stage(url, bypass_cache, timing)
+        context = await self._read_context(timing)
+        with timing.span("llm_queue"):
+            await self.llm_slots.acquire()
+        try:
+            result, fill_info = await loop.run_in_executor(
+                self.llm_executor,
+                lambda: fill_fields(self, fields, context, bypass_cache=bypass_cache, timing=timing),
+            )
+        except Exception as error:
+            raise PipelineError(llm_error_status(error), "llm_failed", str(error)) from error
+        finally:
+            self.llm_slots.release()
+        result["cache"] = cache_report(form_cache_status, fill_info)
+        return result
+
+    async def _run_coalesced(self, url: str, bypass_cache: bool, timing: RequestTiming) -> dict:
+        key = pipeline_key(url, await self._read_context(timing), bypass_cache=bypass_cache)
+        future, leader = self.pipeline_flight.claim(key)
+        if leader:
+            try:
+                result = await self._run_staged(url, bypass_cache, timing)
+            except BaseException as error:
+                self.pipeline_flight.finish(key, future, error=error)
+            else:
+                self.pipeline_flight.finish(key, future, result)
+        with timed(None if leader else timing, "coalesced_wait"):
+            result = copy.deepcopy(await asyncio.wrap_future(future))
+        result["cache"]["coalesced"] = not leader
+        return result
+
+    async def _stream_pipeline(self, writer, url: str, bypass_cache: bool, timing: RequestTiming):
+        loop = asyncio.get_running_loop()
+        fields, form_cache_status = await self._load_stage(url, bypass_cache, timing)
+        context = await self._read_context(timing)
+        events = asyncio.Queue()
+
+        def on_entry(index: int, entry: dict):
+            loop.call_soon_threadsafe(events.put_nowait, {"event": "filled_field", "index": index, "data": entry})
+
+        def run():
+            try:
+                return fill_fields(
+                    self, fields, context, bypass_cache=bypass_cache, on_entry=on_entry, timing=timing
+                )
+            finally:
+                loop.call_soon_threadsafe(events.put_nowait, None)
+
+        await self._send(writer, 200, content_type="application/x-ndjson; charset=utf-8", streaming=True)
+        await self._write_event(writer, {"event": "fields", "data": fields})
+        with timing.span("llm_queue"):
+            await self.llm_slots.acquire()
+        try:
+            task = loop.run_in_executor(self.llm_executor, run)
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                await self._write_event(writer, event)
+
+            try:
+                result, fill_info = await task
+            except Exception as error:
+                await self._write_event(writer, {"event": "error", "error": "llm_failed", "detail": str(error)})
+                self.metrics.record_request(timing, "pipeline_stream", llm_error_status(error))
+                return
+        finally:
+            self.llm_slots.release()
+        result["cache"] = cache_report(form_cache_status, fill_info)
+        await self._write_event(writer, {"event": "done", "data": result, "timing": timing.header()})
+        self.metrics.record_request(timing, "pipeline_stream", 200, result["cache"])
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(
+            f"Pipeline API (async) listening on http://{host}:{port} "
+            f"extract={self.extract_concurrency} llm={self.llm_concurrency} queue={self.queue_size}"
+        )
+        async with server:
+            await server.serve_forever()
+
+    def shutdown(self):
+        self.extract_executor.shutdown(wait=False, cancel_futures=True)
+        self.llm_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_async_server(host: str, port: int):
+    server = AsyncPipelineServer(
+        extract_concurrency=int(
+            os.getenv("PIPELINE_EXTRACT_CONCURRENCY", os.getenv("PIPELINE_BROWSERS", str(DEFAULT_POOL_SIZE)))
+        ),
+        llm_concurrency=int(os.getenv("PIPELINE_LLM_CONCURRENCY", str(DEFAULT_LLM_CONCURRENCY))),
+        queue_size=int(os.getenv("PIPELINE_QUEUE_SIZE", str(DEFAULT_QUEUE_SIZE))),
+    )
+    attach_resources(server)
+    # Batch items run through the stage slots above instead of the thread pool runner.
+    server.batch_runner.shutdown()
+    server.batch_runner = None
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        release_resources(server)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+DEFAULT_LLM_WORKERS = 4
+MAX_BATCH_URLS = 100
+
+
+def _outcome(future) -> tuple:
+    if future.cancelled():
+        return None, RuntimeError("Batch runner shut down before the item ran.")
+    error = future.exception()
+    return (None if error else future.result()), error
+
+
+class BatchRunner:
+    # Two-stage worker pool shared by every batch: extraction of the next item
+    # overlaps the LLM call for earlier ones, and both stages stay bounded no
+    # matter how many batches are in flight.
+    def __init__(self, extract_workers: int, llm_workers: int = DEFAULT_LLM_WORKERS):
+        self.extract_workers = max(1, int(extract_workers))
+        self.llm_workers = max(1, int(llm_workers))
+        self.extract_executor = ThreadPoolExecutor(self.extract_workers, thread_name_prefix="batch-extract")
+        self.llm_executor = ThreadPoolExecutor(self.llm_workers, thread_name_prefix="batch-llm")
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.failed = 0
+
+    def run(self, items: list, prepare, complete):
+        # Yields (index, result, error) in completion order. prepare(item) runs
+        # on an extraction worker, complete(item, prepared) on an LLM worker.
+        done = queue.Queue()
+        with self.lock:
+            self.batches += 1
+            self.items += len(items)
+
+        def finish(index: int, future):
+            done.put((index, *_outcome(future)))
+
+        def advance(index: int, future):
+            prepared, error = _outcome(future)
+            if error is not None:
+                done.put((index, None, error))
+                return
+            try:
+                self.llm_executor.submit(complete, items[index], prepared).add_done_callback(
+                    partial(finish, index)
+                )
+            except RuntimeError as shutdown:
+                done.put((index, None, shutdown))
+
+        for index, item in enumerate(items):
+            self.extract_executor.submit(prepare, item).add_done_callback(partial(advance, index))
+        for _ in items:
+            index, result, error = done.get()
+            if error is not None:
+                with self.lock:
+                    self.failed += 1
+            yield index, result, error
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "extract_workers": self.extract_workers,
+                "llm_workers": self.llm_workers,
+                "batches": self.batches,
+                "items": self.items,
+                "failed": self.failed,
+            }
+
+    def shutdown(self):
+        self.extract_executor.shutdown(wait=False, cancel_futures=True)
+        self.llm_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_batch_urls(payload: dict) -> list:
+    urls = payload.get("urls")
+    if not isinstance(urls, list) or not urls:
+        raise ValueError("Missing 'urls' list in request body.")
+    if len(urls) > MAX_BATCH_URLS:
+        raise ValueError(f"At most {MAX_BATCH_URLS} URLs per batch.")
+    cleaned = [url.strip() if isinstance(url, str) else "" for url in urls]
+    if not all(cleaned):
+        raise ValueError("Every entry in 'urls' must be a non-empty string.")
+    return cleaned
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+import argparse
+import html
+import json
+import random
+from pathlib import Path
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+SEED = 7535043
+
+COUNTRIES = [f"Country {index:03d} +{index}" for index in range(1, 241)]
+SCHOOLS = [f"University of Example {index}" for index in range(1, 301)]
+YES_NO = ["Yes", "No"]
+EEO = ["Yes", "No", "I prefer to self-describe", "I don't wish to answer"]
+
+# Renders a Greenhouse-style combobox menu only while the input is open, like
+# react-select, so extraction has to hydrate options through the page.
+COMBOBOX_SCRIPT = """
+<script>
+  const COMBOBOX_OPTIONS = %s;
+  for (const input of document.querySelectorAll("input[role='combobox']")) {
+    const menu = document.getElementById(input.getAttribute("aria-controls"));
+    const open = () => {
+      if (menu.childElementCount) return;
+      setTimeout(() => {
+        for (const label of COMBOBOX_OPTIONS[input.id] || []) {
+          const option = document.createElement("div");
+          option.setAttribute("role", "option");
+          option.textContent = label;
+          menu.appendChild(option);
+        }
+        input.setAttribute("aria-expanded", "true");
+      }, 15);
+    };
+    const close = () => {
+      menu.replaceChildren();
+      input.setAttribute("aria-expanded", "false");
+    };
+    input.addEventListener("mousedown", open);
+    input.addEventListener("keydown", (event) => {
+      if (event.key === "ArrowDown") open();
+      if (event.key === "Escape") close();
+    });
+  }
+</script>
+"""
+# Page furniture the extractor never needs: a web font, a hero image and logos.
+# run_bench's fixture server answers /assets/<name>-<bytes>.<ext> with a body
+# of that size, so nothing binary lives in the repo.
+PAGE_HEAD_ASSETS = (
+    "<style>@font-face { font-family: Brand; src: url('/assets/brand-90000.woff2'); }"
+    " body { font-family: Brand, sans-serif; }</style>"
+)
+PAGE_BODY_ASSETS = '<img src="/assets/hero-350000.jpg" alt="">' + "".join(
+    f'<img src="/assets/logo-{index}-24000.png" alt="">' for index in range(8)
+)
+
+
+def _text(index: int, question: str, kind: str = "text", required: bool = True) -> str:
+    mark = "*" if required else ""
+    return (
+        f'<div class="field"><label for="q_{index}">{html.escape(question)}{mark}</label>'
+        f'<input id="q_{index}" name="q_{index}" type="{kind}"></div>'
+    )
+
+
+def _textarea(index: int, question: str) -> str:
+    return (
+        f'<div class="field"><label for="q_{index}">{html.escape(question)}*</label>'
+        f'<textarea id="q_{index}" name="q_{index}"></textarea></div>'
+    )
+
+
+def _select(index: int, question: str, options: list) -> str:
+    rendered = "".join(f"<option>{html.escape(option)}</option>" for option in options)
+    return (
+        f'<div class="field"><label for="q_{index}">{html.escape(question)}*</label>'
+        f'<select id="q_{index}" name="q_{index}"><option value="">Select...</option>{rendered}</select></div>'
+    )
+
+
+def _checkboxes(index: int, question: str, options: list) -> str:
+    boxes = "".join(
+        f'<label><input type="checkbox" name="q_{index}" value="{html.escape(option)}">{html.escape(option)}</label>'
+        for option in options
+    )
+    return f'<fieldset class="field"><legend>{html.escape(question)}</legend>{boxes}</fieldset>'
+
+
+def _combobox(index: int, question: str) -> str:
+    return (
+        f'<div class="field"><label for="q_{index}">{html.escape(question)}*</label>'
+        f'<input id="q_{index}" role="combobox" class="select__input" aria-expanded="false" '
+        f'aria-controls="q_{index}-listbox"><div id="q_{index}-listbox" role="listbox" class="select__menu"></div></div>'
+    )
+
+
+def _page(title: str, parts: list, combobox_options: dict | None = None) -> str:
+    script = COMBOBOX_SCRIPT % json.dumps(combobox_options) if combobox_options else ""
+    body = "\n".join(parts)
+    return (
+        f"<!doctype html>\n<html><head><meta charset='utf-8'><title>{html.escape(title)}</title>{PAGE_HEAD_ASSETS}"
+        f"</head><body>\n{PAGE_BODY_ASSETS}\n"
+        f'<h1>{html.escape(title)}</h1>\n<form id="application-form" action="/applications">\n{body}\n'
+        f'<button type="submit">Submit application</button>\n</form>\n{script}</body></html>\n'
+    )
+
+
+def standard_form() -> str:
+    parts = [
+        _text(0, "First Name"),
+        _text(1, "Last Name"),
+        _text(2, "Email", "email"),
+        _text(3, "Phone", "tel"),
+        _text(4, "LinkedIn Profile", "url", required=False),
+        _text(5, "Website", "url", required=False),
+        _combobox(6, "Country"),
+        _textarea(7, "In 3-4 sentences, what excites you about this position?"),
+        _textarea(8, "Describe a project you are proud of and your role in it."),
+        _select(9, "Are you authorized to work in the United States?", YES_NO),
+        _select(10, "Will you now or in the future require visa sponsorship?", YES_NO),
+        _select(11, "How did you hear about this job?", ["LinkedIn", "Referral", "Company website", "Other"]),
+        _checkboxes(12, "Acknowledge/Confirm", ["I confirm the information above is accurate"]),
+        _select(13, "I identify my gender as:", ["Female", "Male", "Non-binary", "I don't wish to answer"]),
+        _select(14, "I identify as transgender:", EEO),
+        _select(15, "Veteran Status:", ["Yes, I am a veteran", "No, I am not a veteran", "I don't wish to answer"]),
+        _select(16, "I have a physical disability:", EEO),
+    ]
+    return _page("Standard application", parts, {"q_6": COUNTRIES})
+
+
+def large_form() -> str:
+    rng = random.Random(SEED)
+    parts = [_text(0, "First Name"), _text(1, "Last Name"), _text(2, "Email", "email"), _text(3, "Phone", "tel")]
+    index = 4
+    for block in range(12):
+        parts.append(_textarea(index, f"Essay question {block + 1}: describe a time you handled challenge #{block + 1}."))
+        index += 1
+        for _ in range(6):
+            parts.append(_text(index, f"Short answer {index}: years of experience with tool {rng.randint(1, 99)}"))
+            index += 1
+        parts.append(_select(index, f"Screening question {index}", YES_NO + ["Not applicable"]))
+        index += 1
+        parts.append(_select(index, f"Preferred office for team {block + 1}", [f"Office {n}" for n in range(1, 31)]))
+        index += 1
+        parts.append(_checkboxes(index, f"Skills group {block + 1}", [f"Skill {block}-{n}" for n in range(8)]))
+        index += 1
+    return _page("Large application", parts)
+
+
+def combobox_heavy_form() -> str:
+    rng = random.Random(SEED + 1)
+    parts = [_text(0, "First Name"), _text(1, "Last Name"), _text(2, "Email", "email")]
+    options = {}
+    for index in range(3, 43):
+        count = rng.choice([8, 20, 60, 150, 300])
+        parts.append(_combobox(index, f"Combobox question {index}"))
+        options[f"q_{index}"] = (SCHOOLS if count == 300 else COUNTRIES)[:count]
+    return _page("Combobox-heavy application", parts, options)
+
+
+FIXTURES = {
+    "standard": standard_form,
+    "large": large_form,
+    "combobox_heavy": combobox_heavy_form,
+}
+
+
+def write_fixtures(directory: Path = FIXTURES_DIR) -> list:
+    directory.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name, build in FIXTURES.items():
+        path = directory / f"{name}.html"
+        path.write_text(build(), encoding="utf-8")
+        written.append(path)
+    return written
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Regenerate the benchmark HTML fixtures.")
+    parser.add_argument("--out", default=str(FIXTURES_DIR), help="Directory to write fixtures to")
+    args = parser.parse_args()
+    for path in write_fixtures(Path(args.out)):
+        print(f"Saved: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
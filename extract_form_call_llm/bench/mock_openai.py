@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_LATENCY_MS = 800
+DEFAULT_JITTER_MS = 200
+DEFAULT_TOKENS_PER_SECOND = 400
+DEFAULT_VALUE_CHARS = 40
+STREAM_CHUNK_CHARS = 24
+CHARS_PER_TOKEN = 4
+
+
+def _answer(field_type: str, options: list, value_chars: int):
+    if field_type.startswith("checkbox_group"):
+        return options[:1]
+    if options:
+        return options[0]
+    if field_type.startswith("url"):
+        return "https://example.com/bench"
+    if field_type.startswith("textarea"):
+        return ("Benchmark answer text. " * (value_chars * 4 // 23 + 1))[: value_chars * 4]
+    return ("x" * value_chars)[: max(1, value_chars)]
+
+
+def answer_prompt(prompt: str, value_chars: int) -> dict:
+    # Understands both field encodings the pipeline can send.
+    if "Context A: form fields\n" in prompt:
+        table = prompt.split("Context A: form fields\n", 1)[1]
+        entries = []
+        for row in table.splitlines()[2:]:
+            parts = row.split("|", 3)
+            if len(parts) < 3 or not parts[0].isdigit():
+                continue
+            options = json.JSONDecoder().raw_decode(parts[3])[0] if len(parts) == 4 and parts[3].startswith("[") else []
+            entries.append({"i": int(parts[0]), "value": _answer(parts[1], options, value_chars)})
+        return {"filled_fields": entries}
+
+    fields_text = prompt.split("Context A: greenhouse_fields.json\n", 1)[1]
+    fields, _ = json.JSONDecoder().raw_decode(fields_text)
+    entries = []
+    for field in fields.get("fields") or []:
+        entry = {
+            "id": field.get("id"),
+            "question": field.get("question"),
+            "field_type": field.get("field_type"),
+            "value": _answer(field.get("field_type") or "text", field.get("options") or [], value_chars),
+        }
+        if field.get("name"):
+            entry["name"] = field["name"]
+        entries.append(entry)
+    return {"url": fields.get("url"), "field_count": len(entries), "filled_fields": entries}
+
+
+class MockResponsesServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms, jitter_ms, tokens_per_second, value_chars):
+        super().__init__(address, MockResponsesHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_second = tokens_per_second
+        self.value_chars = value_chars
+        self.lock = threading.Lock()
+        self.prefixes = set()
+        self.calls = 0
+        self.latencies = []
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.calls += 1
+            self.latencies.append(seconds)
+
+    def cached_prefix(self, cache_key, prefix_tokens: int) -> int:
+        # Mimics provider prefix caching: the second request with a key hits.
+        if not cache_key:
+            return 0
+        with self.lock:
+            seen = cache_key in self.prefixes
+            self.prefixes.add(cache_key)
+        return prefix_tokens if seen else 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+        average = sum(latencies) / len(latencies) if latencies else 0.0
+        return {"calls": self.calls, "avg_latency_ms": round(average * 1000, 1)}
+
+
+class MockResponsesHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        return
+
+    def _usage(self, payload: dict, prompt: str, output_text: str) -> dict:
+        input_tokens = len(prompt) // CHARS_PER_TOKEN
+        prefix = prompt.split("Context A:", 1)[0]
+        cache_key = (payload.get("prompt_cache_key") or "") if prefix != prompt else ""
+        cached = self.server.cached_prefix(cache_key, len(prefix) // CHARS_PER_TOKEN)
+        output_tokens = len(output_text) // CHARS_PER_TOKEN
+        return {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": cached},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+    def _response(self, payload: dict, text: str, usage: dict) -> dict:
+        return {
+            "id": f"resp_{uuid.uuid4().hex}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": payload.get("model"),
+            "output": [
+                {
+                    "id": f"msg_{uuid.uuid4().hex}",
+                    "type": "message",
+                    "status": "completed",
+                    "role": "assistant",
+                    "content": [{"type": "output_text", "text": text, "annotations": []}],
+                }
+            ],
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": usage,
+        }
+
+    def do_POST(self):
+        started = time.monotonic()
+        if not self.path.rstrip("/").endswith("/responses"):
+            self.send_error(404)
+            return
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))) or b"{}")
+        prompt = "".join(
+            part.get("text", "")
+            for message in payload.get("input") or []
+            for part in (message.get("content") or [])
+            if isinstance(part, dict)
+        )
+        text = json.dumps(answer_prompt(prompt, self.server.value_chars), ensure_ascii=False)
+        usage = self._usage(payload, prompt, text)
+
+        # Time to first token, then output paced at the configured token rate.
+        latency = self.server.latency_ms + random.uniform(-1, 1) * self.server.jitter_ms
+        generation = usage["output_tokens"] / max(1, self.server.tokens_per_second)
+        time.sleep(max(0.0, latency / 1000))
+        if payload.get("stream"):
+            self._stream(payload, text, usage, generation)
+        else:
+            time.sleep(generation)
+            body = json.dumps(self._response(payload, text, usage)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        self.server.record(time.monotonic() - started)
+
+    def _stream(self, payload: dict, text: str, usage: dict, generation: float):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        chunks = [text[start : start + STREAM_CHUNK_CHARS] for start in range(0, len(text), STREAM_CHUNK_CHARS)]
+        pause = generation / max(1, len(chunks))
+        sequence = 0
+        for chunk in chunks:
+            sequence += 1
+            self._event(
+                "response.output_text.delta",
+                {"delta": chunk, "item_id": "msg_bench", "output_index": 0, "content_index": 0, "sequence_number": sequence},
+            )
+            time.sleep(pause)
+        self._event("response.completed", {"response": self._response(payload, text, usage), "sequence_number": sequence + 1})
+
+    def _event(self, event_type: str, data: dict):
+        payload = json.dumps({"type": event_type, **data})
+        self.wfile.write(f"event: {event_type}\ndata: {payload}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def start_mock_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency_ms: float = DEFAULT_LATENCY_MS,
+    jitter_ms: float = DEFAULT_JITTER_MS,
+    tokens_per_second: float = DEFAULT_TOKENS_PER_SECOND,
+    value_chars: int = DEFAULT_VALUE_CHARS,
+) -> MockResponsesServer:
+    server = MockResponsesServer((host, port), latency_ms, jitter_ms, tokens_per_second, value_chars)
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI Responses API for benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS, help="Time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=DEFAULT_JITTER_MS)
+    parser.add_argument("--tokens-per-second", type=float, default=DEFAULT_TOKENS_PER_SECOND)
+    parser.add_argument("--value-chars", type=int, default=DEFAULT_VALUE_CHARS, help="Size of each text answer")
+    args = parser.parse_args()
+
+    server = MockResponsesServer(
+        (args.host, args.port), args.latency_ms, args.jitter_ms, args.tokens_per_second, args.value_chars
+    )
+    print(f"Mock Responses API listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
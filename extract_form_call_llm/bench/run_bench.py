@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from fixtures import FIXTURES, FIXTURES_DIR, write_fixtures
+from mock_openai import DEFAULT_LATENCY_MS, DEFAULT_TOKENS_PER_SECOND, DEFAULT_VALUE_CHARS, start_mock_server
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+PIPELINE_DIR = BENCH_DIR.parent
+ROOT_DIR = PIPELINE_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+STAGES = ["extract", "first_answer", "fill", "total"]
+BROWSER_PROCESS_HINTS = ("chrome", "chromium", "headless_shell")
+SAMPLE_INTERVAL_SECONDS = 0.2
+
+
+class QuietFixtureHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        return
+
+    def do_GET(self):
+        # /assets/<name>-<bytes>.<ext>: synthetic images and fonts for the fixtures.
+        if not self.path.startswith("/assets/"):
+            super().do_GET()
+            return
+        name = self.path.rsplit("/", 1)[-1]
+        try:
+            size = int(name.rsplit(".", 1)[0].rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(name))
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        self.wfile.write(bytes(size))
+
+
+def start_fixture_server(directory: Path) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietFixtureHandler, directory=str(directory)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fixtures", daemon=True).start()
+    return server
+
+
+def percentile(values: list, fraction: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    # Nearest rank, so p99 of a small run is an observed value, not an interpolation.
+    rank = max(1, int(round(fraction * len(ordered) + 0.5)))
+    return round(ordered[min(rank, len(ordered)) - 1], 1)
+
+
+def summarize(values: list) -> dict:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": round(max(values), 1) if values else None,
+    }
+
+
+class ProcessSampler(threading.Thread):
+    # Samples RSS of the server process tree (browsers included) from /proc.
+    def __init__(self, pid: int):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.pid = pid
+        self.peak_rss_bytes = 0
+        self.peak_browsers = 0
+        self.supported = Path("/proc").is_dir()
+        self.stopped = threading.Event()
+
+    def _tree(self) -> list:
+        children = {}
+        for stat_path in Path("/proc").glob("[0-9]*/stat"):
+            try:
+                fields = stat_path.read_text().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            children.setdefault(int(fields[1]), []).append(int(stat_path.parent.name))
+        tree = []
+        pending = [self.pid]
+        while pending:
+            pid = pending.pop()
+            tree.append(pid)
+            pending.extend(children.get(pid, []))
+        return tree
+
+    def sample(self):
+        rss = 0
+        browsers = 0
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        for pid in self._tree():
+            try:
+                rss += int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * page_size
+                name = Path(f"/proc/{pid}/comm").read_text().strip().lower()
+            except (OSError, IndexError, ValueError):
+                continue
+            # Count browser main processes only, not their renderer/gpu helpers.
+            cmdline = Path(f"/proc/{pid}/cmdline").read_bytes() if Path(f"/proc/{pid}/cmdline").exists() else b""
+            if any(hint in name for hint in BROWSER_PROCESS_HINTS) and b"--type=" not in cmdline:
+                browsers += 1
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+        self.peak_browsers = max(self.peak_browsers, browsers)
+
+    def run(self):
+        while self.supported and not self.stopped.wait(SAMPLE_INTERVAL_SECONDS):
+            self.sample()
+
+    def stop(self) -> dict:
+        self.stopped.set()
+        if not self.supported:
+            return {"peak_rss_mb": None, "peak_browser_processes": None}
+        self.sample()
+        return {
+            "peak_rss_mb": round(self.peak_rss_bytes / (1024 * 1024), 1),
+            "peak_browser_processes": self.peak_browsers,
+        }
+
+
+def run_request(port: int, url: str, bypass_cache: bool, timeout: float) -> dict:
+    body = json.dumps({"url": url, "stream": True, "bypass_cache": bypass_cache}).encode("utf-8")
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/pipeline", data=body, headers={"Content-Type": "application/json"}
+    )
+    started = time.monotonic()
+    timings = {}
+    record = {"url": url, "status": None, "error": None, "timings_ms": timings}
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            record["status"] = response.status
+            fields_at = None
+            for line in response:
+                event = json.loads(line)
+                now = (time.monotonic() - started) * 1000
+                if event["event"] == "fields":
+                    fields_at = now
+                    timings["extract"] = now
+                    record["field_count"] = len((event.get("data") or {}).get("fields") or [])
+                elif event["event"] == "filled_field" and "first_answer" not in timings:
+                    timings["first_answer"] = now - (fields_at or 0)
+                elif event["event"] == "done":
+                    timings["fill"] = now - (fields_at or 0)
+                    record["cache"] = (event.get("data") or {}).get("cache")
+                elif event["event"] == "error":
+                    record["error"] = event.get("error")
+    except urllib.error.HTTPError as error:
+        record["status"] = error.code
+        record["error"] = json.loads(error.read() or b"{}").get("error") or str(error)
+    except Exception as error:
+        record["error"] = str(error)
+    timings["total"] = (time.monotonic() - started) * 1000
+    return record
+
+
+def wait_for_health(port: int, process: subprocess.Popen, timeout: float) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Pipeline server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=2) as response:
+                return json.loads(response.read())
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError("Pipeline server did not become healthy in time")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_pipeline(args, workdir: Path, mock_port: int, port: int) -> subprocess.Popen:
+    env_path = workdir / "bench.env"
+    env_path.write_text(
+        "OPENAI_API_KEY=bench\n"
+        f"OPENAI_BASE_URL=http://127.0.0.1:{mock_port}/v1\n"
+        f"OPENAI_MODEL={args.model}\n"
+        + "".join(f"{line}\n" for line in args.openai_env),
+        encoding="utf-8",
+    )
+    env = {
+        **os.environ,
+        "PIPELINE_PORT": str(port),
+        "PIPELINE_SERVER_MODE": args.server_mode,
+        "PIPELINE_BROWSERS": str(args.browsers),
+        "PIPELINE_ENV_PATH": str(env_path),
+        "PIPELINE_FORM_CACHE_PATH": str(workdir / "form_schema.sqlite"),
+        "PIPELINE_LLM_CACHE_PATH": str(workdir / "llm_results.sqlite"),
+        "PIPELINE_ANSWER_MEMORY_PATH": str(workdir / "answer_memory.sqlite"),
+        "PYTHONUNBUFFERED": "1",
+    }
+    if args.full_pages:
+        env["PIPELINE_LEAN_PAGES"] = "0"
+    if args.no_caches:
+        env.update({"PIPELINE_FORM_CACHE": "0", "PIPELINE_LLM_CACHE": "0", "PIPELINE_ANSWER_MEMORY": "0"})
+    log = open(workdir / "pipeline.log", "w", encoding="utf-8")
+    return subprocess.Popen(
+        [sys.executable, str(PIPELINE_DIR / "pipeline_api.py")],
+        cwd=str(PIPELINE_DIR),
+        env=env,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def page_network_totals(metrics_text: str) -> dict:
+    # Picks the page-load counters out of the Prometheus text from /metrics.
+    totals = {"requests_blocked": 0, "requests_loaded": 0, "bytes_loaded": 0}
+    names = {
+        'pipeline_page_requests_total{outcome="blocked"}': "requests_blocked",
+        'pipeline_page_requests_total{outcome="loaded"}': "requests_loaded",
+        "pipeline_page_bytes_loaded_total": "bytes_loaded",
+    }
+    for line in metrics_text.splitlines():
+        name, _, value = line.rpartition(" ")
+        if name in names:
+            totals[names[name]] = int(float(value))
+    return totals
+
+
+def compare(current: dict, baseline_path: Path) -> list:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    lines = [f"Compared with {baseline_path.name}:"]
+    for stage in STAGES:
+        for key in ["p50", "p95"]:
+            before = (baseline["stages"].get(stage) or {}).get(key)
+            after = (current["stages"].get(stage) or {}).get(key)
+            if before and after:
+                lines.append(f"  {stage:<13} {key}: {before:>9.1f} -> {after:>9.1f} ms ({(after - before) / before:+.1%})")
+    before, after = baseline.get("throughput_rps"), current.get("throughput_rps")
+    if before and after:
+        lines.append(f"  throughput:        {before:>9.2f} -> {after:>9.2f} req/s ({(after - before) / before:+.1%})")
+    return lines
+
+
+def run(args) -> dict:
+    if not all((FIXTURES_DIR / f"{name}.html").exists() for name in FIXTURES):
+        write_fixtures()
+    fixture_server = start_fixture_server(FIXTURES_DIR)
+    mock = start_mock_server(
+        latency_ms=args.llm_latency_ms,
+        jitter_ms=args.llm_jitter_ms,
+        tokens_per_second=args.tokens_per_second,
+        value_chars=args.value_chars,
+    )
+    fixture_port = fixture_server.server_address[1]
+    names = args.fixtures or list(FIXTURES)
+    urls = []
+    for number in range(args.requests):
+        name = names[number % len(names)]
+        # Distinct job ids defeat the form schema cache unless --repeat-urls is set.
+        job_id = (number % len(names)) if args.repeat_urls else number
+        urls.append(f"http://127.0.0.1:{fixture_port}/{name}.html?gh_jid=bench-{name}-{job_id}")
+
+    port = free_port()
+    with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as workdir:
+        process = start_pipeline(args, Path(workdir), mock.server_address[1], port)
+        sampler = ProcessSampler(process.pid)
+        try:
+            wait_for_health(port, process, args.startup_timeout)
+            sampler.start()
+            for url in urls[: args.warmup]:
+                run_request(port, url, args.bypass_cache, args.timeout)
+
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                records = list(
+                    executor.map(lambda url: run_request(port, url, args.bypass_cache, args.timeout), urls)
+                )
+            wall_seconds = time.monotonic() - started
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=5) as response:
+                health = json.loads(response.read())
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+                page_network = page_network_totals(response.read().decode("utf-8"))
+        finally:
+            resources = sampler.stop()
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            fixture_server.shutdown()
+            mock.shutdown()
+
+    succeeded = [record for record in records if record["status"] == 200 and not record["error"]]
+    errors = {}
+    for record in records:
+        if record not in succeeded:
+            key = record["error"] or f"http_{record['status']}"
+            errors[key] = errors.get(key, 0) + 1
+    pool = health.get("browser_pool") or {}
+    return {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            key: value for key, value in vars(args).items() if key not in {"out", "compare"}
+        },
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "requests": len(records),
+        "succeeded": len(succeeded),
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(succeeded) / wall_seconds, 3) if wall_seconds else None,
+        "stages": {
+            stage: summarize([record["timings_ms"][stage] for record in succeeded if stage in record["timings_ms"]])
+            for stage in STAGES
+        },
+        "resources": {**resources, "browser_pool_size": pool.get("size")},
+        "page_network": page_network,
+        "mock_llm": mock.stats(),
+        "health": health,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark for the pipeline API.")
+    parser.add_argument("--fixtures", nargs="*", choices=sorted(FIXTURES), help="Fixtures to cycle through (default: all)")
+    parser.add_argument("--requests", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=1, help="Sequential requests before measuring")
+    parser.add_argument("--server-mode", choices=["threaded", "async"], default="threaded")
+    parser.add_argument("--browsers", type=int, default=2)
+    parser.add_argument("--model", default="bench-model")
+    parser.add_argument("--llm-latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=DEFAULT_TOKENS_PER_SECOND)
+    parser.add_argument("--value-chars", type=int, default=DEFAULT_VALUE_CHARS)
+    parser.add_argument(
+        "--openai-env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Extra .env line for the pipeline, e.g. OPENAI_SHARDING=0 (repeatable)",
+    )
+    parser.add_argument("--no-caches", action="store_true", help="Disable form, LLM and answer caches")
+    parser.add_argument("--full-pages", action="store_true", help="Load every page resource (PIPELINE_LEAN_PAGES=0)")
+    parser.add_argument("--bypass-cache", action="store_true", help="Send bypass_cache with every request")
+    parser.add_argument("--repeat-urls", action="store_true", help="Reuse one URL per fixture to exercise caches")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--out", help="Result path (default: bench/results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous result JSON to compare against")
+    args = parser.parse_args()
+
+    result = run(args)
+    out = Path(args.out) if args.out else RESULTS_DIR / f"bench-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print(f"requests={result['requests']} ok={result['succeeded']} errors={result['errors']}")
+    print(f"throughput={result['throughput_rps']} req/s wall={result['wall_seconds']}s")
+    for stage, stats in result["stages"].items():
+        print(f"  {stage:<13} p50={stats['p50']} p95={stats['p95']} p99={stats['p99']} ms (n={stats['count']})")
+    print(f"resources={result['resources']} mock_llm={result['mock_llm']}")
+    print(f"page_network={result['page_network']}")
+    if args.compare:
+        print("\n".join(compare(result, Path(args.compare))))
+    print(f"Saved: {out}")
+    return 0 if result["succeeded"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from forms_extraction import launch_browser
+
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_RECYCLE_AFTER = 50
+HEALTH_CHECK_INTERVAL_SECONDS = 30.0
+STARTUP_TIMEOUT_SECONDS = 60.0
+INTERACTIVE_PRIORITY = 0
+BACKGROUND_PRIORITY = 1
+SHUTDOWN_PRIORITY = 2
+
+_background = ContextVar("browser_pool_background", default=False)
+
+
+@contextmanager
+def background_tasks():
+    # Pool tasks submitted from inside this block (prefetch, cache refresh) run
+    # after queued interactive ones and never occupy every worker.
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+class BrowserWorker(threading.Thread):
+    # Playwright's sync API is bound to the thread that started it, so every
+    # pooled browser lives on its own worker thread and pulls tasks from the
+    # shared pool queue.
+    def __init__(self, pool, index: int):
+        super().__init__(name=f"browser-worker-{index}", daemon=True)
+        self.pool = pool
+        self.index = index
+        self.ready = Future()
+        self.browser = None
+        self.pages_served = 0
+        self.launches = 0
+        self.crashes = 0
+        self.last_health_check = 0.0
+
+    def _launch(self, playwright):
+        self.browser = launch_browser(playwright)
+        self.pages_served = 0
+        self.launches += 1
+
+    def _close_browser(self):
+        if self.browser is None:
+            return
+        try:
+            self.browser.close()
+        except Exception:
+            pass
+        self.browser = None
+
+    def _is_healthy(self) -> bool:
+        if self.browser is None:
+            return False
+        try:
+            return self.browser.is_connected()
+        except Exception:
+            return False
+
+    def _ensure_browser(self, playwright):
+        self.last_health_check = time.monotonic()
+        if not self._is_healthy():
+            if self.browser is not None:
+                self.crashes += 1
+            self._close_browser()
+            self._launch(playwright)
+        elif self.pages_served >= self.pool.recycle_after:
+            self._close_browser()
+            self._launch(playwright)
+
+    def _run_task(self, fn):
+        context = self.browser.new_context(**self.pool.context_options)
+        try:
+            page = context.new_page()
+            return fn(page)
+        finally:
+            self.pages_served += 1
+            try:
+                context.close()
+            except Exception:
+                pass
+
+    def run(self):
+        try:
+            from playwright.sync_api import sync_playwright
+        except Exception:
+            self.ready.set_exception(
+                RuntimeError(
+                    "Playwright is not installed. Install with: pip install playwright && python -m playwright install chromium"
+                )
+            )
+            return
+
+        with sync_playwright() as playwright:
+            try:
+                self._launch(playwright)
+            except Exception as error:
+                self.ready.set_exception(error)
+                return
+            self.ready.set_result(True)
+
+            while True:
+                try:
+                    _, _, task = self.pool.tasks.get(timeout=HEALTH_CHECK_INTERVAL_SECONDS)
+                except queue.Empty:
+                    try:
+                        self._ensure_browser(playwright)
+                    except Exception as error:
+                        print(f"[browser-pool] worker {self.index} relaunch failed: {error}")
+                    continue
+
+                if task is None:
+                    break
+
+                fn, future = task
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                try:
+                    self._ensure_browser(playwright)
+                    result = self._run_task(fn)
+                except Exception as error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+            self._close_browser()
+
+    def stats(self) -> dict:
+        return {
+            "index": self.index,
+            "alive": self.is_alive(),
+            "connected": self._is_healthy(),
+            "pages_served": self.pages_served,
+            "launches": self.launches,
+            "crashes": self.crashes,
+        }
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: int = DEFAULT_POOL_SIZE,
+        recycle_after: int = DEFAULT_RECYCLE_AFTER,
+        context_options: dict | None = None,
+    ):
+        self.size = max(1, int(size))
+        self.recycle_after = max(1, int(recycle_after))
+        self.context_options = dict(context_options or {})
+        # (priority, sequence, task): interactive first, FIFO within a priority.
+        self.tasks = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        # One worker stays free of background work whenever the pool has more than one.
+        self.background_limit = max(1, self.size - 1)
+        self.background_slots = threading.BoundedSemaphore(self.background_limit)
+        self.workers = []
+
+    def start(self):
+        started_at = time.monotonic()
+        self.workers = [BrowserWorker(self, index) for index in range(self.size)]
+        for worker in self.workers:
+            worker.start()
+        try:
+            for worker in self.workers:
+                worker.ready.result(timeout=STARTUP_TIMEOUT_SECONDS)
+        except Exception:
+            self.shutdown()
+            raise
+        elapsed_ms = int((time.monotonic() - started_at) * 1000)
+        print(f"[browser-pool] {self.size} browser(s) warm in {elapsed_ms} ms")
+        return self
+
+    def submit(self, fn) -> Future:
+        if not self.workers:
+            raise RuntimeError("Browser pool is not started.")
+        future = Future()
+        if _background.get():
+            # Blocks the background caller, never an interactive one.
+            self.background_slots.acquire()
+            future.add_done_callback(lambda _: self.background_slots.release())
+            self.tasks.put((BACKGROUND_PRIORITY, next(self.sequence), (fn, future)))
+        else:
+            self.tasks.put((INTERACTIVE_PRIORITY, next(self.sequence), (fn, future)))
+        return future
+
+    def run(self, fn, timeout: float | None = None):
+        return self.submit(fn).result(timeout=timeout)
+
+    def shutdown(self):
+        for worker in self.workers:
+            if worker.is_alive():
+                self.tasks.put((SHUTDOWN_PRIORITY, next(self.sequence), None))
+        for worker in self.workers:
+            worker.join(timeout=10)
+        self.workers = []
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "recycle_after": self.recycle_after,
+            "queued": self.tasks.qsize(),
+            "background_limit": self.background_limit,
+            "workers": [worker.stats() for worker in self.workers],
+        }
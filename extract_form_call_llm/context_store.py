@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import hashlib
+import threading
+import time
+from pathlib import Path
+
+from answer_memory import context_hash
+from llm_call import build_context_block, load_env, resolve_model
+from profile_prefill import parse_profile
+
+
+DEFAULT_CHECK_INTERVAL_SECONDS = 1.0
+
+
+def _file_signature(path: Path):
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class ContextStore:
+    # Keeps profile.txt, resume.txt and .env parsed in memory. Files are re-read
+    # only when their mtime/size changes, and stat() runs at most once per
+    # check interval, so the request hot path normally touches no files at all.
+    def __init__(
+        self,
+        profile_path: Path,
+        resume_path: Path,
+        env_path: Path,
+        check_interval: float = DEFAULT_CHECK_INTERVAL_SECONDS,
+    ):
+        self.profile_path = Path(profile_path)
+        self.resume_path = Path(resume_path)
+        self.env_path = Path(env_path)
+        self.check_interval = float(check_interval)
+        self.lock = threading.Lock()
+        self.signatures = None
+        self.current = None
+        self.checked_at = 0.0
+        self.reloads = 0
+
+    def _signatures(self):
+        return tuple(_file_signature(path) for path in [self.profile_path, self.resume_path, self.env_path])
+
+    def _load(self) -> dict:
+        profile_text = self.profile_path.read_text(encoding="utf-8")
+        resume_text = self.resume_path.read_text(encoding="utf-8")
+        env_map = load_env(self.env_path)
+        context_block = build_context_block(profile_text, resume_text)
+        return {
+            "profile_text": profile_text,
+            "resume_text": resume_text,
+            "env_map": env_map,
+            "model": resolve_model(env_map),
+            "context_hash": context_hash(profile_text, resume_text),
+            "profile_record": parse_profile(profile_text),
+            "context_block": context_block,
+            "context_block_hash": hashlib.sha256(context_block.encode("utf-8")).hexdigest(),
+        }
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self.lock:
+            if self.current is not None and now - self.checked_at < self.check_interval:
+                return self.current
+            signatures = self._signatures()
+            self.checked_at = now
+            if self.current is None or signatures != self.signatures:
+                # Raises OSError when profile/resume are missing; callers report it.
+                self.current = self._load()
+                self.signatures = signatures
+                self.reloads += 1
+            return self.current
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"reloads": self.reloads, "loaded": self.current is not None}
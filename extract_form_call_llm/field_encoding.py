@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+import json
+import math
+
+
+FIELD_ENCODINGS = ("compact", "json")
+DEFAULT_FIELD_ENCODING = "compact"
+# Rough BPE average for English prose and JSON; only used for the savings report.
+CHARS_PER_TOKEN = 4
+
+
+def _cell(text) -> str:
+    return " ".join(str(text or "").split()).replace("|", "/")
+
+
+def encode_fields(fields: dict) -> str:
+    # One row per field: i|type|question|options. Keys, nulls and false flags
+    # are dropped; the row index is how the model refers back to the field.
+    rows = [f"url: {fields.get('url') or ''}", "rows: i|type|question|options (* after type = required)"]
+    for index, field in enumerate(fields.get("fields") or []):
+        field_type = field.get("field_type") or "text"
+        if field.get("expects_url") and field_type == "text":
+            field_type = "url"
+        if field.get("required"):
+            field_type += "*"
+        row = f"{index}|{field_type}|{_cell(field.get('question'))}"
+        options = field.get("options") or []
+        if options:
+            row += "|" + json.dumps(options, ensure_ascii=False, separators=(",", ":"))
+        if field.get("current_value"):
+            row += f"|current={json.dumps(field['current_value'], ensure_ascii=False)}"
+        rows.append(row)
+    return "\n".join(rows)
+
+
+def decode_answers(parsed: dict, field_count: int) -> dict:
+    values = {}
+    for entry in parsed.get("filled_fields") or []:
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get("i")
+        if isinstance(index, str) and index.isdigit():
+            index = int(index)
+        if isinstance(index, int) and 0 <= index < field_count:
+            values.setdefault(index, entry.get("value"))
+    return values
+
+
+def output_schema(encoding: str = DEFAULT_FIELD_ENCODING) -> dict:
+    # Strict structured outputs need every property listed as required.
+    value = {"anyOf": [{"type": "string"}, {"type": "array", "items": {"type": "string"}}]}
+    if encoding == "compact":
+        entry = {"i": {"type": "integer"}, "value": value}
+        top = {}
+    else:
+        nullable = {"type": ["string", "null"]}
+        entry = {"id": nullable, "name": nullable, "question": {"type": "string"}, "field_type": {"type": "string"}}
+        entry["value"] = value
+        top = {"url": {"type": "string"}, "field_count": {"type": "integer"}}
+    entries = {"type": "object", "properties": entry, "required": list(entry), "additionalProperties": False}
+    properties = {**top, "filled_fields": {"type": "array", "items": entries}}
+    return {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
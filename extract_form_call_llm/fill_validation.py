@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+import difflib
+import re
+from functools import lru_cache
+
+
+FUZZY_CUTOFF = 0.85
+# Two fuzzy candidates closer than this are ambiguous; leave those to the model.
+FUZZY_MARGIN = 0.05
+# Looser than FUZZY_CUTOFF: these only suggest options to the re-ask prompt.
+CANDIDATE_CUTOFF = 0.4
+REPAIR_CANDIDATES = 5
+URL_RE = re.compile(r"^(?:https?://)?(?:www\.)?[\w-]+(?:\.[\w-]+)+(?:[/?#]\S*)?$", re.IGNORECASE)
+
+
+def _normalize(text: str) -> str:
+    text = re.sub(r"[^\w\s+]", " ", (text or "").casefold())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _ratio(left: str, right: str) -> float:
+    return difflib.SequenceMatcher(None, left, right).ratio()
+
+
+class OptionIndex:
+    # Lookup tiers from strict to loose. Prefix and fuzzy matches only count
+    # when there is a single clear winner.
+    def __init__(self, options: tuple):
+        self.options = options
+        self.exact = set(options)
+        self.folded = {}
+        self.normalized = {}
+        for option in options:
+            self.folded.setdefault(option.casefold(), option)
+            self.normalized.setdefault(_normalize(option), option)
+
+    def match(self, value: str):
+        if value in self.exact:
+            return value, "exact"
+        folded = value.casefold()
+        if folded in self.folded:
+            return self.folded[folded], "casefold"
+        normalized = _normalize(value)
+        if normalized in self.normalized:
+            return self.normalized[normalized], "normalized"
+        # "United States" -> "United States +1": accept a prefix only when unique.
+        prefixed = [option for key, option in self.normalized.items() if len(normalized) >= 3 and key.startswith(normalized)]
+        if len(prefixed) == 1:
+            return prefixed[0], "prefix"
+        close = difflib.get_close_matches(normalized, list(self.normalized), n=2, cutoff=FUZZY_CUTOFF)
+        if len(close) == 2 and _ratio(normalized, close[0]) - _ratio(normalized, close[1]) < FUZZY_MARGIN:
+            return None, None
+        if close:
+            return self.normalized[close[0]], "fuzzy"
+        return None, None
+
+    def closest(self, value: str, n: int) -> list:
+        keys = difflib.get_close_matches(_normalize(value), list(self.normalized), n=n, cutoff=CANDIDATE_CUTOFF)
+        return [self.normalized[key] for key in keys]
+
+
+@lru_cache(maxsize=512)
+def build_option_index(options: tuple) -> OptionIndex:
+    return OptionIndex(options)
+
+
+def _is_url_field(field: dict) -> bool:
+    return field.get("field_type") == "url" or bool(field.get("expects_url"))
+
+
+def _check_url(value):
+    if not isinstance(value, str):
+        return "invalid", value
+    text = value.strip()
+    if not text:
+        return "valid", value
+    if not URL_RE.match(text):
+        return "invalid", value
+    if text.lower().startswith("http://"):
+        text = "https://" + text[len("http://") :]
+    elif not text.lower().startswith("https://"):
+        text = "https://" + text
+    return ("valid" if text == value else "repaired"), text
+
+
+def _check_choice(field: dict, value):
+    index = build_option_index(tuple(field.get("options") or []))
+    if isinstance(value, list):
+        if len(value) != 1:
+            return ("valid", "") if not value else ("invalid", value)
+        value = value[0]
+    if not isinstance(value, str):
+        return "invalid", value
+    if not value.strip():
+        return ("invalid" if field.get("required") else "valid"), ""
+    matched, _ = index.match(value.strip())
+    if matched is None:
+        return "invalid", value
+    return ("valid" if matched == value else "repaired"), matched
+
+
+def _check_checkboxes(field: dict, value):
+    index = build_option_index(tuple(field.get("options") or []))
+    if isinstance(value, str):
+        items = re.split(r"[,;\n]", value)
+    elif isinstance(value, list) and all(isinstance(item, str) for item in value):
+        items = value
+    else:
+        # True, None or an object names no option; the re-ask has to pick them.
+        return "invalid", value
+    items = [item.strip() for item in items if item.strip()]
+    matched = []
+    for item in items:
+        option, _ = index.match(item)
+        if option is not None and option not in matched:
+            matched.append(option)
+    if (items or field.get("required")) and not matched:
+        return "invalid", value
+    return ("valid" if matched == value else "repaired"), matched
+
+
+def check_value(field: dict, value):
+    # Returns (status, value) with status "valid", "repaired" or "invalid".
+    field_type = field.get("field_type")
+    if field_type == "checkbox_group" and field.get("options"):
+        return _check_checkboxes(field, value)
+    if field_type == "select" and field.get("options"):
+        return _check_choice(field, value)
+    if _is_url_field(field):
+        return _check_url(value)
+    if isinstance(value, list):
+        return "repaired", ", ".join(str(item) for item in value)
+    return "valid", value
+
+
+def closest_options(field: dict, value, n: int = REPAIR_CANDIDATES) -> list:
+    # Options nearest to a rejected answer, so the re-ask can see what the
+    # model probably meant even when the shortlist missed it.
+    index = build_option_index(tuple(field.get("options") or []))
+    found = []
+    for item in value if isinstance(value, list) else [value]:
+        if isinstance(item, str) and item.strip():
+            found.extend(option for option in index.closest(item, n) if option not in found)
+    return found
+
+
+def validate_entries(fields: list, entries: list, indexes: list) -> tuple:
+    # Repairs entries in place and returns the indexes that are still invalid.
+    stats = {"checked": 0, "valid": 0, "repaired": 0, "invalid": 0}
+    invalid = []
+    for index in indexes:
+        entry = entries[index]
+        status, value = check_value(fields[index], entry.get("value"))
+        stats["checked"] += 1
+        stats[status] += 1
+        if status == "invalid":
+            invalid.append(index)
+        else:
+            entry["value"] = value
+    return invalid, stats
+
+
+ACKNOWLEDGE = {"field_type": "checkbox_group", "required": True, "options": ["I confirm the information above is accurate"]}
+COUNTRY = {"field_type": "select", "required": True, "options": ["United States +1", "Canada +1"]}
+# (field, model value, expected status, expected value); run this file to check them.
+SELF_CHECK_CASES = [
+    (ACKNOWLEDGE, True, "invalid", True),
+    (ACKNOWLEDGE, None, "invalid", None),
+    (ACKNOWLEDGE, [], "invalid", []),
+    (ACKNOWLEDGE, "i confirm the information above is accurate", "repaired", ACKNOWLEDGE["options"]),
+    (ACKNOWLEDGE, ACKNOWLEDGE["options"], "valid", ACKNOWLEDGE["options"]),
+    (COUNTRY, "United States", "repaired", "United States +1"),
+    (COUNTRY, "", "invalid", ""),
+    ({"field_type": "url"}, "github.com/octocat", "repaired", "https://github.com/octocat"),
+]
+
+
+def main() -> int:
+    failures = 0
+    for field, value, status, expected in SELF_CHECK_CASES:
+        result = check_value(field, value)
+        if result != (status, expected):
+            failures += 1
+            print(f"FAIL {field.get('field_type')} {value!r}: got {result!r}, want {(status, expected)!r}")
+    print(f"{len(SELF_CHECK_CASES) - failures}/{len(SELF_CHECK_CASES)} cases passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
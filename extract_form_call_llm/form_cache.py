@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / ".cache" / "form_schema.sqlite"
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_TTL_SECONDS = 6 * 3600
+DEFAULT_REFRESH_AFTER_SECONDS = 3600
+FINGERPRINT_TIMEOUT_SECONDS = 10
+TRACKING_PARAMS = {"gh_src", "source", "ref", "referrer"}
+
+
+def _is_greenhouse_host(hostname: str) -> bool:
+    # boards.greenhouse.io, job-boards.greenhouse.io and their regional variants.
+    return hostname == "greenhouse.io" or hostname.endswith(".greenhouse.io")
+
+
+def normalize_job_url(url: str) -> str:
+    parsed = urlparse(url.strip())
+    query = dict(parse_qsl(parsed.query, keep_blank_values=False))
+    greenhouse = _is_greenhouse_host((parsed.hostname or "").lower())
+
+    # gh_jid is Greenhouse's own embed parameter wherever the board is hosted;
+    # token is too generic to trust anywhere but Greenhouse itself.
+    gh_jid = query.get("gh_jid") or (query.get("token") if greenhouse else None)
+    if gh_jid:
+        return f"greenhouse:{gh_jid}"
+
+    host = parsed.netloc.lower()
+    path_parts = [part for part in parsed.path.split("/") if part]
+    if greenhouse and "jobs" in path_parts:
+        index = path_parts.index("jobs")
+        if index + 1 < len(path_parts) and path_parts[index + 1].isdigit():
+            return f"greenhouse:{path_parts[index + 1]}"
+
+    kept = sorted(
+        (key, value)
+        for key, value in query.items()
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    path = "/".join(path_parts)
+    suffix = f"?{urlencode(kept)}" if kept else ""
+    return f"{host}/{path}{suffix}"
+
+
+class _FormControlParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.signatures = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in {"input", "select", "textarea"}:
+            return
+        attr_map = dict(attrs)
+        if (attr_map.get("type") or "").lower() in {"hidden", "submit", "button"}:
+            return
+        self.signatures.append(
+            "|".join([tag, attr_map.get("type") or "", attr_map.get("name") or "", attr_map.get("id") or ""])
+        )
+
+
+def fetch_fingerprint(url: str) -> str | None:
+    # Cheap revalidation: hash the static form controls of the raw HTML without
+    # launching a browser. Pages that render the form client-side yield None.
+    request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0 (form-schema-cache)"})
+    with urllib.request.urlopen(request, timeout=FINGERPRINT_TIMEOUT_SECONDS) as response:
+        html = response.read().decode("utf-8", errors="replace")
+    parser = _FormControlParser()
+    parser.feed(html)
+    if not parser.signatures:
+        return None
+    return hashlib.sha256("\n".join(parser.signatures).encode("utf-8")).hexdigest()
+
+
+def is_storable(fields: dict) -> bool:
+    # Empty or failed extractions (closed postings, half-rendered pages) must
+    # never replace a schema that worked.
+    return bool(fields.get("fields")) and not fields.get("error")
+
+
+class FormSchemaCache:
+    def __init__(
+        self,
+        path: Path | str | None = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MEMORY_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        refresh_after_seconds: float = DEFAULT_REFRESH_AFTER_SECONDS,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.refresh_after_seconds = float(refresh_after_seconds)
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.refreshing = set()
+        self.hits = 0
+        self.misses = 0
+        self.refresh_rejected = 0
+        self.db = None
+        if path:
+            db_path = Path(path)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS form_schema ("
+                "key TEXT PRIMARY KEY, fields TEXT NOT NULL, stored_at REAL NOT NULL, fingerprint TEXT)"
+            )
+            self.db.commit()
+
+    def _remember(self, key: str, entry: dict):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _load_from_disk(self, key: str) -> dict | None:
+        if self.db is None:
+            return None
+        row = self.db.execute(
+            "SELECT fields, stored_at, fingerprint FROM form_schema WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+        return {"fields": json.loads(row[0]), "stored_at": row[1], "fingerprint": row[2]}
+
+    def _write_to_disk(self, key: str, entry: dict):
+        if self.db is None:
+            return
+        self.db.execute(
+            "INSERT OR REPLACE INTO form_schema (key, fields, stored_at, fingerprint) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(entry["fields"], ensure_ascii=False), entry["stored_at"], entry["fingerprint"]),
+        )
+        self.db.commit()
+
+    def get(self, key: str) -> dict | None:
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                entry = self._load_from_disk(key)
+            if entry is None or time.time() - entry["stored_at"] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits += 1
+            return copy.deepcopy(entry["fields"])
+
+    def put(self, key: str, fields: dict, fingerprint: str | None = None):
+        entry = {"fields": copy.deepcopy(fields), "stored_at": time.time(), "fingerprint": fingerprint}
+        with self.lock:
+            self._remember(key, entry)
+            self._write_to_disk(key, entry)
+
+    def _touch(self, key: str, fingerprint: str | None, revalidated: bool = True):
+        with self.lock:
+            entry = self.memory.get(key) or self._load_from_disk(key)
+            if entry is None:
+                return
+            if revalidated:
+                entry["stored_at"] = time.time()
+            entry["fingerprint"] = fingerprint
+            self._remember(key, entry)
+            self._write_to_disk(key, entry)
+
+    def _needs_refresh(self, key: str) -> bool:
+        if self.refresh_after_seconds <= 0:
+            return False
+        entry = self.memory.get(key)
+        return entry is not None and time.time() - entry["stored_at"] > self.refresh_after_seconds
+
+    def _refresh(self, key: str, url: str, extract):
+        try:
+            with self.lock:
+                entry = self.memory.get(key)
+                known_fingerprint = entry.get("fingerprint") if entry else None
+            try:
+                fingerprint = fetch_fingerprint(url)
+            except Exception:
+                fingerprint = None
+            if fingerprint and fingerprint == known_fingerprint:
+                self._touch(key, fingerprint)
+                return
+            fields = extract(url)
+            fields.pop("readiness", None)
+            if not is_storable(fields):
+                # Keep serving the old schema; resetting its age stops every hit
+                # from scheduling another doomed refresh.
+                with self.lock:
+                    self.refresh_rejected += 1
+                self._touch(key, known_fingerprint)
+                print(f"[form-cache] refresh for {key} returned no usable schema; keeping cached entry")
+                return
+            self.put(key, fields, fingerprint=fingerprint)
+        except Exception as error:
+            print(f"[form-cache] refresh failed for {key}: {error}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    def _record_fingerprint(self, key: str, url: str):
+        try:
+            fingerprint = fetch_fingerprint(url)
+        except Exception:
+            return
+        if fingerprint:
+            self._touch(key, fingerprint, revalidated=False)
+
+    def store(self, key: str, url: str, fields: dict):
+        self.put(key, fields)
+        if self.refresh_after_seconds > 0:
+            threading.Thread(target=self._record_fingerprint, args=(key, url), daemon=True).start()
+
+    def schedule_refresh(self, key: str, url: str, extract) -> bool:
+        with self.lock:
+            if key in self.refreshing or not self._needs_refresh(key):
+                return False
+            self.refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key, url, extract), daemon=True).start()
+        return True
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "memory_entries": len(self.memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshing": len(self.refreshing),
+                "refresh_rejected": self.refresh_rejected,
+            }
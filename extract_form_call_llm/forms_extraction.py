@@ -2,139 +2,72 @@
 import argparse
 import json
 import sys
+import time
 from pathlib import Path
 from urllib.parse import urlparse
 
+from metrics import timed
+from page_profile import LEAN_CONTEXT_OPTIONS, apply_lean_profile
+from static_extraction import StaticExtractionIncomplete, extract_static
+
 TARGET_URL = "https://job-boards.greenhouse.io/greenhouse/jobs/7535043?gh_jid=7535043"
 OUTPUT_FILE = Path(__file__).with_name("greenhouse_fields.json")
+FORM_SELECTOR = "form#application_form, form#application-form, form[action*='applications'], form"
+READY_QUIET_MS = 500
+READY_TIMEOUT_MS = 20000
+COMBOBOX_OPEN_TIMEOUT_MS = 1000
+COMBOBOX_CLOSE_TIMEOUT_MS = 300
+
+
+READINESS_JS = r"""
+    async ({ formSelector, quietMs, timeoutMs }) => {
+      const startedAt = performance.now();
+      const countInputs = () => {
+        const form = document.querySelector(formSelector);
+        return form ? form.querySelectorAll("input, select, textarea").length : -1;
+      };
 
-
-def launch_browser(playwright):
-    home = Path.home()
-    executable_candidates = []
-
-    executable_candidates.extend(
-        sorted(
-            home.glob(
-                "Library/Caches/ms-playwright/chromium-*/chrome-mac-arm64/Google Chrome for Testing.app/Contents/MacOS/Google Chrome for Testing"
-            ),
-            reverse=True,
-        )
-    )
-    executable_candidates.extend(
-        sorted(
-            home.glob(
-                "Library/Caches/ms-playwright/chromium-*/chrome-mac-x64/Google Chrome for Testing.app/Contents/MacOS/Google Chrome for Testing"
-            ),
-            reverse=True,
-        )
-    )
-    executable_candidates.extend(
-        sorted(
-            home.glob(
-                "Library/Caches/ms-playwright/chromium_headless_shell-*/chrome-headless-shell-mac-arm64/chrome-headless-shell"
-            ),
-            reverse=True,
-        )
-    )
-    executable_candidates.extend(
-        sorted(
-            home.glob(
-                "Library/Caches/ms-playwright/chromium_headless_shell-*/chrome-headless-shell-mac-x64/chrome-headless-shell"
-            ),
-            reverse=True,
-        )
-    )
-
-    launch_error = None
-    for executable in executable_candidates:
-        try:
-            return playwright.chromium.launch(headless=True, executable_path=str(executable))
-        except Exception as error:
-            launch_error = error
-
-    try:
-        return playwright.chromium.launch(headless=True)
-    except Exception:
-        if launch_error:
-            raise launch_error
-        raise
-
-
-def _collect_visible_option_texts(page, selector):
-    values = page.eval_on_selector_all(
-        selector,
-        """(nodes) => {
-          const isVisible = (el) => {
-            const style = window.getComputedStyle(el);
-            const rect = el.getBoundingClientRect();
-            return style.display !== "none" && style.visibility !== "hidden" && rect.width > 0 && rect.height > 0;
-          };
-          const clean = (value) => (value || "").replace(/\\s+/g, " ").trim();
-          const out = [];
-          for (const node of nodes) {
-            if (!isVisible(node)) continue;
-            const text = clean(node.textContent);
-            if (text && !out.includes(text)) out.push(text);
+      return await new Promise((resolve) => {
+        let lastCount = countInputs();
+        let mutations = 0;
+        let quietTimer = null;
+        let hardTimer = null;
+        let observer = null;
+
+        const finish = (signal) => {
+          if (observer) observer.disconnect();
+          clearTimeout(quietTimer);
+          clearTimeout(hardTimer);
+          resolve({
+            signal,
+            elapsed_ms: Math.round(performance.now() - startedAt),
+            input_count: Math.max(lastCount, 0),
+            mutations,
+          });
+        };
+
+        const armQuietTimer = () => {
+          clearTimeout(quietTimer);
+          if (lastCount > 0) quietTimer = setTimeout(() => finish("inputs_stable"), quietMs);
+        };
+
+        observer = new MutationObserver(() => {
+          mutations += 1;
+          const count = countInputs();
+          if (count !== lastCount) {
+            lastCount = count;
+            armQuietTimer();
           }
-          return out;
-        }""",
-    )
-    return values or []
-
-
-def hydrate_combobox_options(page, result):
-    fields = result.get("fields", [])
-    for field in fields:
-        if field.get("field_type") != "select":
-            continue
-        element_id = field.get("id")
-        if not element_id:
-            continue
-
-        locator = page.locator(f"[id='{element_id}'][role='combobox'], [id='{element_id}'].select__input")
-        if locator.count() == 0:
-            continue
-
-        try:
-            locator.first.click()
-            page.wait_for_timeout(180)
-            listbox_id = locator.first.get_attribute("aria-controls")
-            option_selector = f"#{listbox_id} [role='option']" if listbox_id else ".select__menu [role='option']"
-            if not page.locator(option_selector).count():
-                locator.first.focus()
-                page.keyboard.press("ArrowDown")
-                page.wait_for_timeout(180)
-                listbox_id = locator.first.get_attribute("aria-controls")
-                option_selector = f"#{listbox_id} [role='option']" if listbox_id else ".select__menu [role='option']"
-            options = _collect_visible_option_texts(page, option_selector)
-            if options:
-                field["options"] = options
-            page.keyboard.press("Escape")
-            page.wait_for_timeout(80)
-        except Exception:
-            # Continue extraction if a specific combobox cannot be opened in headless mode.
-            continue
-
-
-def _validate_url(url: str) -> str:
-    parsed = urlparse(url)
-    if parsed.scheme not in {"http", "https"} or not parsed.netloc:
-        raise ValueError(f"Invalid URL: {url}")
-    return url
-
-
-def extract_fields(url: str) -> dict:
-    try:
-        from playwright.sync_api import sync_playwright
-    except Exception:
-        raise RuntimeError(
-            "Playwright is not installed. Install with: pip install playwright && python -m playwright install chromium"
-        )
+        });
+        observer.observe(document.documentElement, { childList: true, subtree: true });
+        hardTimer = setTimeout(() => finish(lastCount < 0 ? "form_not_found" : "timeout"), timeoutMs);
+        armQuietTimer();
+      });
+    }
+    """
 
-    target_url = _validate_url(url)
 
-    extractor_js = r"""
+EXTRACTOR_JS = r"""
     () => {
       const form = document.querySelector(
         "form#application_form, form#application-form, form[action*='applications'], form"
@@ -322,15 +255,275 @@ def extract_fields(url: str) -> dict:
     }
     """
 
-    with sync_playwright() as playwright:
-        browser = launch_browser(playwright)
-        page = browser.new_page()
-        page.goto(target_url, wait_until="domcontentloaded", timeout=60000)
-        page.wait_for_timeout(2500)
-        page.wait_for_selector("form", timeout=30000)
 
-        result = page.evaluate(extractor_js)
+# Opens, harvests and closes every combobox in one evaluate call. Each step
+# waits on the listbox appearing or disappearing instead of a fixed sleep.
+HYDRATE_COMBOBOX_JS = r"""
+    async ({ ids, openTimeoutMs, closeTimeoutMs }) => {
+      const clean = (value) => (value || "").replace(/\s+/g, " ").trim();
+      const isVisible = (el) => {
+        const style = window.getComputedStyle(el);
+        const rect = el.getBoundingClientRect();
+        return style.display !== "none" && style.visibility !== "hidden" && rect.width > 0 && rect.height > 0;
+      };
+
+      const waitFor = (predicate, timeoutMs) =>
+        new Promise((resolve) => {
+          const immediate = predicate();
+          if (immediate) {
+            resolve(immediate);
+            return;
+          }
+          let observer = null;
+          let timer = null;
+          const done = (value) => {
+            if (observer) observer.disconnect();
+            clearTimeout(timer);
+            resolve(value);
+          };
+          observer = new MutationObserver(() => {
+            const value = predicate();
+            if (value) done(value);
+          });
+          observer.observe(document.body, {
+            childList: true,
+            subtree: true,
+            attributes: true,
+            attributeFilter: ["aria-expanded", "aria-controls", "class", "style"],
+          });
+          timer = setTimeout(() => done(null), timeoutMs);
+        });
+
+      // The menu counts as open once its container shows up, even when it only
+      // holds a "No options" or loading notice, so empty menus do not burn the
+      // whole timeout. Without aria-controls, only a menu inside this
+      // combobox's own wrapper counts, never another combobox's closing menu.
+      const openMenu = (el) => {
+        const listboxId = el.getAttribute("aria-controls");
+        const listbox = listboxId ? document.getElementById(listboxId) : null;
+        if (listbox && (isVisible(listbox) || el.getAttribute("aria-expanded") === "true")) return listbox;
+        const wrapper = el.closest(".select__container") || el.closest(".select__control")?.parentElement;
+        const menu = wrapper ? wrapper.querySelector(".select__menu, .select__menu-notice") : null;
+        return menu && isVisible(menu) ? menu : null;
+      };
+
+      const pressKey = (el, key) =>
+        el.dispatchEvent(new KeyboardEvent("keydown", { key, code: key, bubbles: true, cancelable: true }));
+
+      const optionsById = {};
+      for (const id of ids) {
+        const escaped = CSS.escape(id);
+        const el = document.querySelector(`[id="${escaped}"][role='combobox'], [id="${escaped}"].select__input`);
+        if (!el) continue;
+
+        try {
+          el.focus();
+          for (const type of ["mousedown", "mouseup", "click"]) {
+            el.dispatchEvent(new MouseEvent(type, { bubbles: true, cancelable: true, view: window }));
+          }
+          let menu = await waitFor(() => openMenu(el), openTimeoutMs);
+          if (!menu) {
+            el.focus();
+            pressKey(el, "ArrowDown");
+            menu = await waitFor(() => openMenu(el), openTimeoutMs);
+          }
+
+          if (menu) {
+            const options = [];
+            for (const node of Array.from(menu.querySelectorAll("[role='option']")).filter(isVisible)) {
+              const text = clean(node.textContent);
+              if (text && !options.includes(text)) options.push(text);
+            }
+            if (options.length) optionsById[id] = options;
+          }
+
+          // Make sure this menu is gone before the next combobox opens.
+          pressKey(el, "Escape");
+          const closed = await waitFor(() => !openMenu(el), closeTimeoutMs);
+          el.blur();
+          if (!closed) await waitFor(() => !openMenu(el), closeTimeoutMs);
+        } catch (error) {
+          // Continue extraction if a specific combobox cannot be opened in headless mode.
+          continue;
+        }
+      }
+      return optionsById;
+    }
+    """
+
+
+def launch_browser(playwright):
+    home = Path.home()
+    executable_candidates = []
+
+    executable_candidates.extend(
+        sorted(
+            home.glob(
+                "Library/Caches/ms-playwright/chromium-*/chrome-mac-arm64/Google Chrome for Testing.app/Contents/MacOS/Google Chrome for Testing"
+            ),
+            reverse=True,
+        )
+    )
+    executable_candidates.extend(
+        sorted(
+            home.glob(
+                "Library/Caches/ms-playwright/chromium-*/chrome-mac-x64/Google Chrome for Testing.app/Contents/MacOS/Google Chrome for Testing"
+            ),
+            reverse=True,
+        )
+    )
+    executable_candidates.extend(
+        sorted(
+            home.glob(
+                "Library/Caches/ms-playwright/chromium_headless_shell-*/chrome-headless-shell-mac-arm64/chrome-headless-shell"
+            ),
+            reverse=True,
+        )
+    )
+    executable_candidates.extend(
+        sorted(
+            home.glob(
+                "Library/Caches/ms-playwright/chromium_headless_shell-*/chrome-headless-shell-mac-x64/chrome-headless-shell"
+            ),
+            reverse=True,
+        )
+    )
+
+    launch_error = None
+    for executable in executable_candidates:
+        try:
+            return playwright.chromium.launch(headless=True, executable_path=str(executable))
+        except Exception as error:
+            launch_error = error
+
+    try:
+        return playwright.chromium.launch(headless=True)
+    except Exception:
+        if launch_error:
+            raise launch_error
+        raise
+
+
+def hydrate_combobox_options(page, result):
+    select_ids = [
+        field.get("id")
+        for field in result.get("fields", [])
+        if field.get("field_type") == "select" and field.get("id")
+    ]
+    if not select_ids:
+        return
+
+    try:
+        options_by_id = page.evaluate(
+            HYDRATE_COMBOBOX_JS,
+            {"ids": select_ids, "openTimeoutMs": COMBOBOX_OPEN_TIMEOUT_MS, "closeTimeoutMs": COMBOBOX_CLOSE_TIMEOUT_MS},
+        )
+    except Exception:
+        # Keep the extracted schema if the harvest script cannot run on this page.
+        return
+
+    for field in result.get("fields", []):
+        options = (options_by_id or {}).get(field.get("id") or "")
+        if field.get("field_type") == "select" and options:
+            field["options"] = options
+
+
+def _validate_url(url: str) -> str:
+    parsed = urlparse(url)
+    if parsed.scheme not in {"http", "https"} or not parsed.netloc:
+        raise ValueError(f"Invalid URL: {url}")
+    return url
+
+
+def wait_for_form_ready(page, quiet_ms: int = READY_QUIET_MS, timeout_ms: int = READY_TIMEOUT_MS) -> dict:
+    readiness = page.evaluate(
+        READINESS_JS,
+        {"formSelector": FORM_SELECTOR, "quietMs": int(quiet_ms), "timeoutMs": int(timeout_ms)},
+    )
+    if readiness.get("signal") == "form_not_found":
+        raise RuntimeError(f"No form found within {int(timeout_ms)} ms.")
+    return readiness
+
+
+def extract_fields_from_page(
+    page,
+    url: str,
+    quiet_ms: int = READY_QUIET_MS,
+    timeout_ms: int = READY_TIMEOUT_MS,
+    timing=None,
+    lean: bool = True,
+) -> dict:
+    network = apply_lean_profile(page) if lean else None
+    with timed(timing, "page_load"):
+        page.goto(url, wait_until="domcontentloaded", timeout=60000)
+    with timed(timing, "readiness"):
+        readiness = wait_for_form_ready(page, quiet_ms=quiet_ms, timeout_ms=timeout_ms)
+
+    with timed(timing, "dom_extract"):
+        result = page.evaluate(EXTRACTOR_JS)
+    with timed(timing, "combobox_hydration"):
         hydrate_combobox_options(page, result)
+    if network is not None:
+        readiness["network"] = network.summary()
+    result["readiness"] = readiness
+    return result
+
+
+def extract_fields(
+    url: str,
+    pool=None,
+    quiet_ms: int = READY_QUIET_MS,
+    timeout_ms: int = READY_TIMEOUT_MS,
+    timing=None,
+    lean: bool = True,
+    static: bool = True,
+) -> dict:
+    # lean applies the page-load profile from page_profile; a pool should be
+    # created with LEAN_CONTEXT_OPTIONS to match. static tries a browserless
+    # parse of the served HTML first and only falls back to Chromium when that
+    # cannot see the whole form.
+    target_url = _validate_url(url)
+
+    static_fallback = None
+    if static:
+        try:
+            return extract_static(target_url, timing=timing)
+        except StaticExtractionIncomplete as incomplete:
+            static_fallback = str(incomplete)
+
+    result = _extract_with_browser(target_url, pool, quiet_ms, timeout_ms, timing, lean)
+    if static_fallback is not None:
+        result.setdefault("readiness", {})["static_fallback"] = static_fallback
+    return result
+
+
+def _extract_with_browser(target_url: str, pool, quiet_ms: int, timeout_ms: int, timing, lean: bool) -> dict:
+    if pool is not None:
+        submitted = time.monotonic()
+
+        def run_on_page(page):
+            if timing is not None:
+                timing.add("browser_wait", time.monotonic() - submitted)
+            return extract_fields_from_page(
+                page, target_url, quiet_ms=quiet_ms, timeout_ms=timeout_ms, timing=timing, lean=lean
+            )
+
+        return pool.run(run_on_page)
+
+    try:
+        from playwright.sync_api import sync_playwright
+    except Exception:
+        raise RuntimeError(
+            "Playwright is not installed. Install with: pip install playwright && python -m playwright install chromium"
+        )
+
+    with sync_playwright() as playwright:
+        with timed(timing, "browser_launch"):
+            browser = launch_browser(playwright)
+        page = browser.new_page(**(LEAN_CONTEXT_OPTIONS if lean else {}))
+        result = extract_fields_from_page(
+            page, target_url, quiet_ms=quiet_ms, timeout_ms=timeout_ms, timing=timing, lean=lean
+        )
         browser.close()
 
     return result
@@ -341,10 +534,28 @@ def main() -> int:
     parser.add_argument("url", nargs="?", default=TARGET_URL, help="Job application page URL.")
     parser.add_argument("--output", default=str(OUTPUT_FILE), help="Path to save JSON output.")
     parser.add_argument("--no-save", action="store_true", help="Print only; do not save output.")
+    parser.add_argument(
+        "--quiet-ms", type=int, default=READY_QUIET_MS, help="Input-count quiet window before extracting."
+    )
+    parser.add_argument(
+        "--ready-timeout-ms", type=int, default=READY_TIMEOUT_MS, help="Upper bound on the readiness wait."
+    )
+    parser.add_argument(
+        "--full-page", action="store_true", help="Load every resource instead of the lean page-load profile."
+    )
+    parser.add_argument(
+        "--browser-only", action="store_true", help="Skip the static HTML fast path and always use Chromium."
+    )
     args = parser.parse_args()
 
     try:
-        result = extract_fields(args.url)
+        result = extract_fields(
+            args.url,
+            quiet_ms=args.quiet_ms,
+            timeout_ms=args.ready_timeout_ms,
+            lean=not args.full_page,
+            static=not args.browser_only,
+        )
     except Exception as error:
         print(str(error), file=sys.stderr)
         return 1
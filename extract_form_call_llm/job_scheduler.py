@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from metrics import RequestTiming
+
+
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_MAX_JOBS = 200
+DEFAULT_MAX_PENDING = 50
+DEFAULT_JOB_TTL_SECONDS = 3600
+FINISHED_STATES = {"succeeded", "failed"}
+
+
+def _iso(timestamp: float | None) -> str | None:
+    return datetime.utcfromtimestamp(timestamp).isoformat() + "Z" if timestamp is not None else None
+
+
+class Job:
+    def __init__(self, url: str, bypass_cache: bool):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.bypass_cache = bypass_cache
+        self.state = "queued"
+        self.stage = None
+        self.timing = RequestTiming()
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.field_count = None
+        self.filled = 0
+        self.result = None
+        self.error = None
+
+    def status(self) -> dict:
+        # Stage spans recorded so far double as progress for pollers.
+        with self.timing.lock:
+            stages = {name: round(seconds * 1000, 1) for name, seconds in self.timing.spans.items()}
+        return {
+            "job_id": self.id,
+            "url": self.url,
+            "status": self.state,
+            "stage": self.stage,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+            "progress": {"stages_ms": stages, "field_count": self.field_count, "filled": self.filled},
+        }
+
+
+class JobScheduler:
+    # Runs pipeline jobs on a fixed worker pool and keeps finished jobs around
+    # for polling until they expire or get pushed out by newer ones.
+    def __init__(
+        self,
+        workers: int = DEFAULT_JOB_WORKERS,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        ttl_seconds: float = DEFAULT_JOB_TTL_SECONDS,
+    ):
+        self.workers = max(1, int(workers))
+        self.max_jobs = max(1, int(max_jobs))
+        self.max_pending = max(1, int(max_pending))
+        self.ttl_seconds = float(ttl_seconds)
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="job")
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()
+        self.pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def _prune(self, now: float):
+        # Oldest finished jobs go first; queued and running jobs are never dropped.
+        overflow = len(self.jobs) - self.max_jobs
+        for job in [job for job in self.jobs.values() if job.state in FINISHED_STATES]:
+            if overflow > 0 or now - job.finished_at > self.ttl_seconds:
+                del self.jobs[job.id]
+                self.evicted += 1
+                overflow -= 1
+
+    def submit(self, url: str, bypass_cache: bool, run) -> Job | None:
+        # run(job) does the work and returns the result; it may update
+        # job.stage and the progress counters as it goes. Returns None when
+        # the queue is full.
+        job = Job(url, bypass_cache)
+        with self.lock:
+            self._prune(time.time())
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                return None
+            self.pending += 1
+            self.submitted += 1
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, run)
+        return job
+
+    def _run(self, job: Job, run):
+        job.state = "running"
+        job.started_at = time.time()
+        result, error = None, None
+        try:
+            result = run(job)
+        except Exception as failure:
+            error = failure
+        job.stage = None
+        job.result, job.error = result, error
+        job.finished_at = time.time()
+        # Flip the state last so readers never see a finished job without its outcome.
+        with self.lock:
+            job.state = "failed" if error is not None else "succeeded"
+            self.pending -= 1
+
+    def get(self, job_id: str) -> Job | None:
+        with self.lock:
+            self._prune(time.time())
+            return self.jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self.lock:
+            states = {}
+            for job in self.jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            return {
+                "workers": self.workers,
+                "max_jobs": self.max_jobs,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "retained": len(self.jobs),
+                "states": states,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "evicted": self.evicted,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
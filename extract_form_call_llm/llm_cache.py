@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import copy
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / ".cache" / "llm_results.sqlite"
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def fill_cache_key(fields: dict, profile_text: str, resume_text: str, model: str, prompt_version: str) -> str:
+    digest = hashlib.sha256()
+    for part in [
+        json.dumps(fields, ensure_ascii=False, sort_keys=True, separators=(",", ":")),
+        profile_text,
+        resume_text,
+        model,
+        prompt_version,
+    ]:
+        encoded = part.encode("utf-8")
+        # Length-prefix each part so adjacent parts can never collide.
+        digest.update(str(len(encoded)).encode("ascii") + b":" + encoded)
+    return digest.hexdigest()
+
+
+class LLMResultCache:
+    def __init__(
+        self,
+        path: Path | str = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        db_path = Path(path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_results ("
+            "key TEXT PRIMARY KEY, result TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def get(self, key: str) -> dict | None:
+        with self.lock:
+            row = self.db.execute("SELECT result FROM llm_results WHERE key = ?", (key,)).fetchone()
+            if not row:
+                self.misses += 1
+                return None
+            self.db.execute("UPDATE llm_results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, result: dict):
+        payload = json.dumps(copy.deepcopy(result), ensure_ascii=False)
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO llm_results (key, result, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload.encode("utf-8")), time.time()),
+            )
+            self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        count, total_bytes = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_results").fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        rows = self.db.execute("SELECT key, size FROM llm_results ORDER BY last_used ASC").fetchall()
+        for key, size in rows:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM llm_results WHERE key = ?", (key,))
+            count -= 1
+            total_bytes -= size
+
+    def stats(self) -> dict:
+        with self.lock:
+            count, total_bytes = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_results"
+            ).fetchone()
+            return {"entries": count, "bytes": total_bytes, "hits": self.hits, "misses": self.misses}
@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
+import hashlib
 import json
+import math
 import sys
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from pathlib import Path
 
+from field_encoding import DEFAULT_FIELD_ENCODING, FIELD_ENCODINGS, decode_answers, encode_fields, estimate_tokens, output_schema
+from metrics import timed
+from openai_client import create_response, get_client, get_policy
+
 
 DEBUG_DIR = Path(__file__).resolve().parent
 ROOT_DIR = DEBUG_DIR.parent
@@ -12,6 +20,52 @@ PROFILE_PATH = ROOT_DIR / "profile.txt"
 RESUME_PATH = ROOT_DIR / "resume.txt"
 ENV_PATH = ROOT_DIR / ".env"
 OUTPUT_PATH = DEBUG_DIR / "llm_response.json"
+DEFAULT_MODEL = "gpt-5-nano"
+# Bump whenever build_prompts changes so cached fill results are not reused.
+PROMPT_VERSION = "3"
+# "prefix_cache" keeps rules, profile and resume as a byte-stable prefix and puts
+# the per-form fields last; "classic" is the original fields-first layout.
+PROMPT_LAYOUTS = ("prefix_cache", "classic")
+DEFAULT_PROMPT_LAYOUT = "prefix_cache"
+# Forms at least this long are split into concurrent requests (see plan_shards).
+DEFAULT_SHARD_MIN_FIELDS = 12
+DEFAULT_MAX_SHARDS = 6
+SHARD_SHORT_FIELDS = 20
+LONG_FORM_FIELD_TYPES = {"textarea"}
+SYSTEM_PROMPT = (
+    "You are an autofill-planning assistant. "
+    "Return ONLY valid JSON, no markdown and no explanations."
+)
+RULES_HEADER = (
+    "Task: produce field fill values for a job application.\n\n"
+    "Rules:\n"
+    "1) Use ONLY the provided context.\n"
+)
+OUTPUT_RULES = {
+    "json": (
+        "2) Output JSON object with keys: url, field_count, filled_fields.\n"
+        "3) filled_fields must be an array with one entry per input field from greenhouse_fields.json, preserving order.\n"
+        "4) Each entry must include: id, question, field_type, value.\n"
+        "5) If input has name, include name.\n"
+    ),
+    "compact": (
+        "2) Output JSON object with one key: filled_fields.\n"
+        "3) filled_fields must be an array with one entry per row of the form fields table, preserving order.\n"
+        '4) Each entry must be {"i": <row index>, "value": <answer>}.\n'
+        "5) Rows are i|type|question|options; a * after the type marks a required field.\n"
+    ),
+}
+VALUE_RULES = (
+    "6) For field_type='select', value must exactly match one option from that field's options.\n"
+    "7) For field_type='checkbox_group', value must be an array of selected option labels.\n"
+    "8) For field_type='url', provide full URL including https:// when available.\n"
+    "9) For required or open-ended text/textarea fields, provide a best-effort 2-4 sentence answer using ONLY the resume/profile context.\n"
+    "10) If truly unknown after using context, use a short, safe, generic answer that does not invent facts.\n"
+    "11) Do not invent facts.\n\n"
+)
+FIELDS_LABELS = {"json": "Context A: greenhouse_fields.json", "compact": "Context A: form fields"}
+
+_shard_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-shard")
 
 
 def read_text(path: Path) -> str:
@@ -38,53 +92,361 @@ def response_text(response) -> str:
     return str(response)
 
 
+class FilledFieldsStreamParser:
+    # Incrementally scans streamed model text and yields each completed object
+    # of the top-level "filled_fields" array as soon as its closing brace arrives.
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_key = None
+        self.in_array = False
+        self.object_start = None
+
+    def feed(self, chunk: str) -> list:
+        self.buffer += chunk
+        entries = []
+        while self.position < len(self.buffer):
+            index = self.position
+            char = self.buffer[index]
+            self.position += 1
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self.last_key = self.buffer[self.string_start + 1 : index]
+                continue
+
+            if char == '"':
+                self.in_string = True
+                self.string_start = index
+            elif char in "{[":
+                if char == "[" and self.depth == 1 and self.last_key == "filled_fields":
+                    self.in_array = True
+                elif char == "{" and self.in_array and self.depth == 2:
+                    self.object_start = index
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if char == "}" and self.in_array and self.depth == 2 and self.object_start is not None:
+                    try:
+                        entry = json.loads(self.buffer[self.object_start : index + 1])
+                    except Exception:
+                        entry = None
+                    if isinstance(entry, dict):
+                        entries.append(entry)
+                    self.object_start = None
+                elif char == "]" and self.in_array and self.depth == 1:
+                    self.in_array = False
+        return entries
+
+
+def response_usage(response) -> dict | None:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    details = getattr(usage, "input_tokens_details", None)
+    return {
+        "input_tokens": getattr(usage, "input_tokens", None),
+        "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+        "output_tokens": getattr(usage, "output_tokens", None),
+        "total_tokens": getattr(usage, "total_tokens", None),
+    }
+
+
+def _stream_response_text(client, policy, request: dict, on_entry, on_usage=None, cancelled=None) -> str:
+    parser = FilledFieldsStreamParser()
+    chunks = []
+    stream = create_response(client, policy, **request, stream=True)
+    for event in stream:
+        if cancelled is not None and cancelled.is_set():
+            # Closing the connection stops generation on the provider side.
+            stream.close()
+            raise RuntimeError("Fill request cancelled.")
+        event_type = getattr(event, "type", "")
+        if event_type == "response.completed" and on_usage is not None:
+            on_usage(response_usage(getattr(event, "response", None)))
+        if event_type != "response.output_text.delta":
+            continue
+        delta = getattr(event, "delta", "") or ""
+        chunks.append(delta)
+        for entry in parser.feed(delta):
+            on_entry(entry)
+    return "".join(chunks)
+
+
+def _object_spans(text: str) -> list:
+    # One pass over the text: (start, end) of every balanced {...}, in closing
+    # order. Quotes only open strings inside an object, so prose like
+    # 'He said "hi"' around the JSON can't derail the scan.
+    stack = []
+    spans = []
+    in_string = False
+    escape = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"' and stack:
+            in_string = True
+        elif char == "{":
+            stack.append(index)
+        elif char == "}" and stack:
+            spans.append((stack.pop(), index + 1))
+    return spans
+
+
 def extract_json(text: str):
     try:
         return json.loads(text)
     except Exception:
         pass
 
-    decoder = json.JSONDecoder()
-    for index, char in enumerate(text):
-        if char != "{":
+    spans = _object_spans(text)
+    outermost = []
+    boundary = len(text)
+    for start, end in reversed(spans):
+        # Walking back in closing order, a span is outermost iff it ends before
+        # the previous outermost span starts.
+        if end <= boundary:
+            outermost.append((start, end))
+            boundary = start
+    outermost.reverse()
+    # Outermost objects are disjoint, so this is linear; nested spans are only
+    # tried when none of them parse.
+    nested = sorted(set(spans) - set(outermost))
+    for start, end in outermost + nested:
+        try:
+            obj = json.loads(text[start:end])
+        except Exception:
             continue
+        if isinstance(obj, dict):
+            return obj
+
+    # Unbalanced quotes in surrounding prose can hide the object from the scan;
+    # fall back to decoding in place at each brace (no slicing).
+    decoder = json.JSONDecoder()
+    index = text.find("{")
+    while index != -1:
         try:
-            obj, _ = decoder.raw_decode(text[index:])
+            obj, _ = decoder.raw_decode(text, index)
             if isinstance(obj, dict):
                 return obj
         except Exception:
-            continue
+            pass
+        index = text.find("{", index + 1)
     raise ValueError("Could not parse a JSON object from model response.")
 
 
-def build_prompts(fields_json_text: str, profile_text: str, resume_text: str):
-    system_prompt = (
-        "You are an autofill-planning assistant. "
-        "Return ONLY valid JSON, no markdown and no explanations."
-    )
+def resolve_model(env_map: dict, model_override: str | None = None) -> str:
+    return (model_override or env_map.get("OPENAI_MODEL", "")).strip() or DEFAULT_MODEL
 
-    user_prompt = (
-        "Task: produce field fill values for a job application.\n\n"
-        "Rules:\n"
-        "1) Use ONLY the provided context.\n"
-        "2) Output JSON object with keys: url, field_count, filled_fields.\n"
-        "3) filled_fields must be an array with one entry per input field from greenhouse_fields.json, preserving order.\n"
-        "4) Each entry must include: id, question, field_type, value.\n"
-        "5) If input has name, include name.\n"
-        "6) For field_type='select', value must exactly match one option from that field's options.\n"
-        "7) For field_type='checkbox_group', value must be an array of selected option labels.\n"
-        "8) For field_type='url', provide full URL including https:// when available.\n"
-        "9) For required or open-ended text/textarea fields, provide a best-effort 2-4 sentence answer using ONLY the resume/profile context.\n"
-        "10) If truly unknown after using context, use a short, safe, generic answer that does not invent facts.\n"
-        "11) Do not invent facts.\n\n"
-        "Context A: greenhouse_fields.json\n"
-        f"{fields_json_text}\n\n"
+
+def resolve_prompt_layout(env_map: dict) -> str:
+    layout = (env_map.get("OPENAI_PROMPT_LAYOUT") or "").strip().lower()
+    return layout if layout in PROMPT_LAYOUTS else DEFAULT_PROMPT_LAYOUT
+
+
+def resolve_max_shards(env_map: dict) -> int:
+    # 1 means unsharded; part of the fill cache key because shard boundaries
+    # change what each request sees.
+    if (env_map.get("OPENAI_SHARDING") or "1").strip() == "0":
+        return 1
+    return max(1, int(env_map.get("OPENAI_MAX_SHARDS") or DEFAULT_MAX_SHARDS))
+
+
+def filled_entry(field: dict, value) -> dict:
+    entry = {
+        "id": field.get("id"),
+        "question": field.get("question"),
+        "field_type": field.get("field_type"),
+        "value": value,
+    }
+    if field.get("name"):
+        entry["name"] = field.get("name")
+    return entry
+
+
+def empty_value(field: dict):
+    return [] if field.get("field_type") == "checkbox_group" else ""
+
+
+def subset_fields(fields: dict, indexes: list) -> dict:
+    items = fields.get("fields") or []
+    selected = [items[index] for index in indexes]
+    return {**fields, "field_count": len(selected), "fields": selected}
+
+
+def merge_filled_fields(fields: dict, local_values: dict, llm_result: dict | None, llm_indexes: list) -> dict:
+    items = fields.get("fields") or []
+    llm_entries = list((llm_result or {}).get("filled_fields") or [])
+    entries_by_id = {}
+    for entry in llm_entries:
+        if isinstance(entry, dict) and entry.get("id"):
+            entries_by_id.setdefault(entry["id"], entry)
+
+    llm_by_index = {}
+    for position, index in enumerate(llm_indexes):
+        field_id = items[index].get("id")
+        if field_id and field_id in entries_by_id:
+            llm_by_index[index] = entries_by_id.pop(field_id)
+        elif not field_id and position < len(llm_entries):
+            llm_by_index[index] = llm_entries[position]
+
+    filled_fields = []
+    for index, field in enumerate(items):
+        if index in local_values:
+            filled_fields.append(filled_entry(field, local_values[index]))
+        elif index in llm_by_index:
+            filled_fields.append(llm_by_index[index])
+        else:
+            filled_fields.append(filled_entry(field, empty_value(field)))
+
+    return {
+        "url": (llm_result or {}).get("url") or fields.get("url"),
+        "field_count": len(filled_fields),
+        "filled_fields": filled_fields,
+    }
+
+
+def build_context_block(profile_text: str, resume_text: str) -> str:
+    return (
         "Context B: profile.txt\n"
         f"{profile_text}\n\n"
         "Context C: resume.txt\n"
         f"{resume_text}\n"
     )
-    return system_prompt, user_prompt
+
+
+def rules_prompt(encoding: str = DEFAULT_FIELD_ENCODING) -> str:
+    return f"{RULES_HEADER}{OUTPUT_RULES[encoding]}{VALUE_RULES}"
+
+
+def build_prompts(
+    fields_text: str,
+    profile_text: str,
+    resume_text: str,
+    context_block: str | None = None,
+    layout: str = DEFAULT_PROMPT_LAYOUT,
+    encoding: str = DEFAULT_FIELD_ENCODING,
+):
+    context_block = context_block or build_context_block(profile_text, resume_text)
+    rules = rules_prompt(encoding)
+    fields_block = f"{FIELDS_LABELS[encoding]}\n{fields_text}\n"
+    if layout == "classic":
+        user_prompt = f"{rules}{fields_block}\n{context_block}"
+    else:
+        # Everything before the fields block is identical across forms, so the
+        # provider can serve it from its prompt cache.
+        user_prompt = f"{rules}{context_block}\n{fields_block}"
+    return SYSTEM_PROMPT, user_prompt
+
+
+def prompt_cache_key(context_block: str, encoding: str = DEFAULT_FIELD_ENCODING) -> str:
+    digest = hashlib.sha256(f"{PROMPT_VERSION}\n{SYSTEM_PROMPT}{rules_prompt(encoding)}{context_block}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def resolve_field_encoding(env_map: dict) -> str:
+    encoding = (env_map.get("OPENAI_FIELD_ENCODING") or "").strip().lower()
+    return encoding if encoding in FIELD_ENCODINGS else DEFAULT_FIELD_ENCODING
+
+
+def plan_shards(fields: dict, min_fields: int = DEFAULT_SHARD_MIN_FIELDS, max_shards: int = DEFAULT_MAX_SHARDS) -> list:
+    # Short factual fields are answered together; each long-form question gets
+    # its own shard so essay output is generated in parallel.
+    items = fields.get("fields") or []
+    if len(items) < min_fields or max_shards < 2:
+        return [list(range(len(items)))]
+    long_indexes = [index for index, field in enumerate(items) if field.get("field_type") in LONG_FORM_FIELD_TYPES]
+    short_indexes = [index for index, field in enumerate(items) if field.get("field_type") not in LONG_FORM_FIELD_TYPES]
+    # Every shard resends the whole rules/profile/resume prefix, so max_shards
+    # is a hard cap. Long-form questions get their slots first; the short
+    # fields share whatever is left, at least one.
+    long_slots = min(len(long_indexes), max_shards - (1 if short_indexes else 0))
+    long_shards = [long_indexes[slot::long_slots] for slot in range(long_slots)]
+    short_slots = min(math.ceil(len(short_indexes) / SHARD_SHORT_FIELDS), max_shards - long_slots)
+    # Contiguous, evenly sized chunks keep related questions (name, contact, ...) together.
+    shard_size = math.ceil(len(short_indexes) / max(1, short_slots))
+    short_shards = [short_indexes[start : start + shard_size] for start in range(0, len(short_indexes), shard_size or 1)]
+    shards = [shard for shard in short_shards + long_shards if shard]
+    return shards if len(shards) > 1 else [list(range(len(items)))]
+
+
+def _sum_usage(usages: list) -> dict | None:
+    usages = [usage for usage in usages if usage]
+    if not usages:
+        return None
+    return {key: sum(usage.get(key) or 0 for usage in usages) for key in usages[0]}
+
+
+def _decode_compact(fields: dict, parsed: dict) -> dict:
+    items = fields.get("fields") or []
+    values = decode_answers(parsed, len(items))
+    filled_fields = [
+        filled_entry(field, values[index] if index in values else empty_value(field)) for index, field in enumerate(items)
+    ]
+    return {"url": fields.get("url"), "field_count": len(filled_fields), "filled_fields": filled_fields}
+
+
+def _fill_request(
+    client,
+    policy,
+    request: dict,
+    fields: dict,
+    prompt_args: tuple,
+    encoding: str,
+    on_entry,
+    on_usage,
+    timing=None,
+    cancelled: threading.Event | None = None,
+) -> dict:
+    json_text = json.dumps(fields, ensure_ascii=False)
+    fields_text = encode_fields(fields) if encoding == "compact" else json_text
+    system_prompt, user_prompt = build_prompts(fields_text, *prompt_args, encoding=encoding)
+    messages = [
+        {"role": "system", "content": [{"type": "input_text", "text": system_prompt}]},
+        {"role": "user", "content": [{"type": "input_text", "text": user_prompt}]},
+    ]
+    request = {**request, "input": messages}
+
+    def record_usage(usage: dict | None):
+        if usage is not None:
+            usage = {**usage, "fields_tokens_saved": estimate_tokens(json_text) - estimate_tokens(fields_text)}
+        on_usage(usage)
+
+    stream_entry = on_entry
+    if on_entry is not None and encoding == "compact":
+        items = fields.get("fields") or []
+
+        def stream_entry(entry: dict):
+            # Expand {"i", "value"} back into the full entry the extension consumes.
+            for index, value in decode_answers({"filled_fields": [entry]}, len(items)).items():
+                on_entry(filled_entry(items[index], value))
+
+    if on_entry is None:
+        response = create_response(client, policy, **request)
+        record_usage(response_usage(response))
+        text = response_text(response)
+    else:
+        text = _stream_response_text(client, policy, request, stream_entry, record_usage, cancelled)
+    with timed(timing, "json_parse"):
+        parsed = json.loads(text) if "text" in request else extract_json(text)
+    if not isinstance(parsed, dict):
+        raise RuntimeError("Model output is not a JSON object.")
+    return _decode_compact(fields, parsed) if encoding == "compact" else parsed
 
 
 def generate_fill_json(
@@ -93,35 +455,87 @@ def generate_fill_json(
     resume_text: str,
     env_map: dict | None = None,
     model_override: str | None = None,
+    on_entry=None,
+    context_block: str | None = None,
+    on_usage=None,
+    timing=None,
 ) -> dict:
     if env_map is None:
         env_map = load_env(ENV_PATH)
 
     api_key = env_map.get("OPENAI_API_KEY", "").strip()
-    model = (model_override or env_map.get("OPENAI_MODEL", "")).strip() or "gpt-5-nano"
+    model = resolve_model(env_map, model_override)
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY missing in .env")
 
-    try:
-        from openai import OpenAI
-    except Exception as error:
-        raise RuntimeError(f"OpenAI SDK import failed: {error}") from error
-
-    fields_json_text = json.dumps(fields, ensure_ascii=False)
-    system_prompt, user_prompt = build_prompts(fields_json_text, profile_text, resume_text)
-
-    client = OpenAI(api_key=api_key)
-    response = client.responses.create(
-        model=model,
-        input=[
-            {"role": "system", "content": [{"type": "input_text", "text": system_prompt}]},
-            {"role": "user", "content": [{"type": "input_text", "text": user_prompt}]},
-        ],
-    )
-    text = response_text(response)
-    parsed = extract_json(text)
-    if not isinstance(parsed, dict):
-        raise RuntimeError("Model output is not a JSON object.")
+    context_block = context_block or build_context_block(profile_text, resume_text)
+    layout = resolve_prompt_layout(env_map)
+    encoding = resolve_field_encoding(env_map)
+    prompt_args = (profile_text, resume_text, context_block, layout)
+
+    client = get_client(api_key, base_url=env_map.get("OPENAI_BASE_URL", "").strip() or None)
+    policy = get_policy(env_map)
+    request = {"model": model}
+    if layout == "prefix_cache":
+        # Routes requests sharing the static prefix to the same cache shard.
+        request["extra_body"] = {"prompt_cache_key": prompt_cache_key(context_block, encoding)}
+    structured = (env_map.get("OPENAI_STRUCTURED_OUTPUT") or "0").strip() == "1"
+    if structured:
+        # Schema-enforced output is always a single valid JSON object.
+        request["text"] = {
+            "format": {"type": "json_schema", "name": "form_fill", "schema": output_schema(encoding), "strict": True}
+        }
+
+    usages = []
+    shards = plan_shards(fields, max_shards=resolve_max_shards(env_map))
+    if len(shards) == 1:
+        parsed = _fill_request(client, policy, request, fields, prompt_args, encoding, on_entry, usages.append, timing)
+    else:
+        entry_lock = threading.Lock()
+        cancelled = threading.Event()
+
+        # Shards always stream, even without a listener, so a failed sibling
+        # can stop them mid-answer instead of paying for output that gets dropped.
+        def shard_entry(entry: dict):
+            # Unnamed fields can't be placed until their shard is merged.
+            if on_entry is not None and entry.get("id"):
+                with entry_lock:
+                    on_entry(entry)
+
+        futures = [
+            _shard_executor.submit(
+                _fill_request,
+                client,
+                policy,
+                request,
+                subset_fields(fields, shard),
+                prompt_args,
+                encoding,
+                shard_entry,
+                usages.append,
+                timing,
+                cancelled,
+            )
+            for shard in shards
+        ]
+        # Wall-clock time follows the slowest shard; any failed shard fails the fill.
+        done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        failed = next((future for future in futures if future in done and future.exception() is not None), None)
+        if failed is not None:
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+            raise failed.exception()
+        filled_fields = [None] * len(fields.get("fields") or [])
+        for shard, future in zip(shards, futures):
+            shard_fields = subset_fields(fields, shard)
+            merged = merge_filled_fields(shard_fields, {}, future.result(), list(range(len(shard))))
+            for index, entry in zip(shard, merged["filled_fields"]):
+                filled_fields[index] = entry
+        parsed = {"url": fields.get("url"), "field_count": len(filled_fields), "filled_fields": filled_fields}
+
+    if on_usage is not None:
+        on_usage(_sum_usage(usages))
     return parsed
 
 
@@ -138,7 +552,7 @@ def main() -> int:
     profile_text = read_text(PROFILE_PATH)
     resume_text = read_text(RESUME_PATH)
     fields = json.loads(fields_json_text)
-    model = env_map.get("OPENAI_MODEL", "").strip() or "gpt-5-nano"
+    model = resolve_model(env_map)
 
     try:
         parsed = generate_fill_json(fields, profile_text, resume_text, env_map=env_map)
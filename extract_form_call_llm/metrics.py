@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+# Seconds; spans range from sub-millisecond parses to minute-long scans.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TOKEN_KINDS = ("input_tokens", "cached_tokens", "output_tokens")
+
+
+class RequestTiming:
+    # Per-request stage spans. Stages can run on other threads (browser
+    # workers, LLM shards), so additions are locked and repeated spans add up.
+    def __init__(self):
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.spans = {}
+
+    def add(self, name: str, seconds: float):
+        with self.lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    @contextmanager
+    def span(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - started)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def header(self) -> str:
+        # X-Pipeline-Timing: stage=milliseconds pairs in the order stages ran.
+        with self.lock:
+            spans = list(self.spans.items())
+        parts = [f"{name}={seconds * 1000:.1f}" for name, seconds in spans]
+        parts.append(f"total={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def timed(timing: RequestTiming | None, name: str):
+    return timing.span(name) if timing is not None else nullcontext()
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[position] += 1
+                break
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    rendered = ",".join(f'{key}="{str(value).replace(chr(34), "")}"' for key, value in sorted(labels.items()))
+    return "{" + rendered + "}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stage_seconds = {}
+        self.counters = {}
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe_stage(self, stage: str, seconds: float):
+        with self.lock:
+            histogram = self.stage_seconds.get(stage)
+            if histogram is None:
+                histogram = self.stage_seconds[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def record_request(self, timing: RequestTiming, endpoint: str, status: int, cache: dict | None = None):
+        with timing.lock:
+            spans = dict(timing.spans)
+        for stage, seconds in spans.items():
+            self.observe_stage(stage, seconds)
+        self.observe_stage("total", timing.elapsed())
+        self.inc("pipeline_requests_total", endpoint=endpoint, status=status)
+        # cache is the report attached to pipeline results (see cache_report).
+        usage = (cache or {}).get("prompt_tokens") or {}
+        for kind in TOKEN_KINDS:
+            if usage.get(kind):
+                self.inc("pipeline_llm_tokens_total", usage[kind], kind=kind.replace("_tokens", ""))
+        if cache:
+            self.inc("pipeline_cache_total", cache="form_schema", status=cache.get("form_schema"))
+            self.inc("pipeline_cache_total", cache="llm_result", status=cache.get("llm_result"))
+
+    def render(self) -> str:
+        lines = [
+            "# HELP pipeline_stage_seconds Time spent per pipeline stage.",
+            "# TYPE pipeline_stage_seconds histogram",
+        ]
+        with self.lock:
+            histograms = sorted(self.stage_seconds.items())
+            counters = sorted(self.counters.items())
+            for stage, histogram in histograms:
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'pipeline_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'pipeline_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'pipeline_stage_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+                lines.append(f'pipeline_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        described = set()
+        for (name, labels), value in counters:
+            if name not in described:
+                described.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_labels(dict(labels))} {value:g}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE_SECONDS = 0.5
+DEFAULT_BACKOFF_MAX_SECONDS = 8.0
+DEFAULT_POOL_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_SECONDS = 120.0
+DEFAULT_TIMEOUT_SECONDS = 120.0
+HEDGE_MIN_SAMPLES = 20
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_clients = {}
+_policies = {}
+_clients_lock = threading.Lock()
+# Sized to the HTTP pool, with one slot per worker: hedged calls only start on an
+# idle worker, so nothing sits in the executor queue while its deadline runs down.
+_hedge_executor = ThreadPoolExecutor(max_workers=DEFAULT_POOL_CONNECTIONS, thread_name_prefix="openai-hedge")
+_hedge_slots = threading.BoundedSemaphore(DEFAULT_POOL_CONNECTIONS)
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE_SECONDS,
+        backoff_max: float = DEFAULT_BACKOFF_MAX_SECONDS,
+        hedge: bool = False,
+        hedge_after: float | None = None,
+    ):
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.hedge = bool(hedge)
+        self.hedge_after = hedge_after
+        # Full response time for plain calls, time to first event for streams;
+        # the two never share a percentile.
+        self.latencies = {"response": deque(maxlen=200), "first_event": deque(maxlen=200)}
+        self.lock = threading.Lock()
+
+    def record(self, kind: str, seconds: float):
+        with self.lock:
+            self.latencies[kind].append(seconds)
+
+    def hedge_deadline(self, kind: str) -> float | None:
+        if not self.hedge:
+            return None
+        if self.hedge_after is not None:
+            return self.hedge_after
+        with self.lock:
+            samples = self.latencies[kind]
+            if len(samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # Full jitter keeps concurrent retries from synchronizing.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+
+
+def policy_from_env(env_map: dict) -> RetryPolicy:
+    hedge_after_ms = (env_map.get("OPENAI_HEDGE_AFTER_MS") or "").strip()
+    return RetryPolicy(
+        max_retries=int(env_map.get("OPENAI_MAX_RETRIES") or DEFAULT_MAX_RETRIES),
+        hedge=(env_map.get("OPENAI_HEDGE") or "0").strip() == "1",
+        hedge_after=int(hedge_after_ms) / 1000 if hedge_after_ms else None,
+    )
+
+
+def get_policy(env_map: dict) -> RetryPolicy:
+    # One policy per configuration so the p95 latency window survives across requests.
+    key = (env_map.get("OPENAI_MAX_RETRIES"), env_map.get("OPENAI_HEDGE"), env_map.get("OPENAI_HEDGE_AFTER_MS"))
+    with _clients_lock:
+        policy = _policies.get(key)
+        if policy is None:
+            policy = _policies[key] = policy_from_env(env_map)
+        return policy
+
+
+def get_client(api_key: str, base_url: str | None = None, pool_connections: int = DEFAULT_POOL_CONNECTIONS):
+    key = (api_key, base_url or None)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is not None:
+            return client
+        try:
+            import httpx
+            from openai import DefaultHttpxClient, OpenAI
+        except Exception as error:
+            raise RuntimeError(f"OpenAI SDK import failed: {error}") from error
+
+        # DefaultHttpxClient keeps the SDK's client defaults (follow_redirects);
+        # pool limits and timeouts are set here.
+        http_client = DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=pool_connections,
+                max_keepalive_connections=pool_connections,
+                keepalive_expiry=DEFAULT_KEEPALIVE_SECONDS,
+            ),
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT_SECONDS, connect=10.0),
+        )
+        # Retries are owned by create_response so backoff and hedging share one policy.
+        client = OpenAI(api_key=api_key, base_url=base_url or None, http_client=http_client, max_retries=0)
+        _clients[key] = client
+        return client
+
+
+def _status_code(error: Exception) -> int | None:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _retry_after(error: Exception) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after") if hasattr(headers, "get") else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    # Connection resets and timeouts carry no status code.
+    return type(error).__name__ in {"APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout"}
+
+
+def _submit_if_idle(call):
+    if not _hedge_slots.acquire(blocking=False):
+        return None
+
+    def run():
+        try:
+            return call()
+        finally:
+            _hedge_slots.release()
+
+    return _hedge_executor.submit(run)
+
+
+class _FirstEventStream:
+    # An SDK stream whose first event has already arrived, so opening a stream
+    # can be timed and hedged like a plain request.
+    def __init__(self, stream):
+        self.stream = stream
+        self.iterator = iter(stream)
+        self.head = [event for event in [next(self.iterator, None)] if event is not None]
+
+    def __iter__(self):
+        yield from self.head
+        yield from self.iterator
+
+    def close(self):
+        close = getattr(self.stream, "close", None)
+        if close is not None:
+            close()
+
+
+def _discard(future):
+    # Releases the connection held by a hedge that lost the race.
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), "close", None)
+    if close is not None:
+        close()
+
+
+def _hedged_call(call, deadline: float):
+    primary = _submit_if_idle(call)
+    if primary is None:
+        # Saturated: hedging now would only add load, so run plain on this thread.
+        return call()
+    futures = {primary}
+    done, _ = wait(futures, timeout=deadline)
+    if not done:
+        hedge = _submit_if_idle(call)
+        if hedge is not None:
+            futures.add(hedge)
+    last_error = None
+    while futures:
+        done, futures = wait(futures, return_when=FIRST_COMPLETED)
+        winner = None
+        for future in done:
+            if winner is None and future.exception() is None:
+                winner = future
+            elif future is not winner:
+                _discard(future)
+        if winner is not None:
+            for future in futures:
+                future.add_done_callback(_discard)
+            return winner.result()
+        last_error = next(iter(done)).exception()
+    raise last_error
+
+
+def create_response(client, policy: RetryPolicy, **kwargs):
+    stream = bool(kwargs.get("stream"))
+    kind = "first_event" if stream else "response"
+
+    def call():
+        response = client.responses.create(**kwargs)
+        # Streams are handed back once their first event arrives, so the
+        # hedge races on time to first event rather than the whole answer.
+        return _FirstEventStream(response) if stream else response
+
+    deadline = policy.hedge_deadline(kind)
+    attempt = 0
+    while True:
+        started = time.monotonic()
+        try:
+            response = _hedged_call(call, deadline) if deadline else call()
+        except Exception as error:
+            if attempt >= policy.max_retries or not _is_retryable(error):
+                raise
+            time.sleep(policy.backoff(attempt, _retry_after(error)))
+            attempt += 1
+            continue
+        policy.record(kind, time.monotonic() - started)
+        return response
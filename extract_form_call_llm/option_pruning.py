@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+import difflib
+import re
+from functools import lru_cache
+
+
+DEFAULT_PRUNE_THRESHOLD = 25
+DEFAULT_TOP_K = 12
+FUZZY_TOKEN_CUTOFF = 0.85
+# Safe answers the model may need even when nothing in the context mentions them.
+FALLBACK_OPTION_RE = re.compile(r"\b(decline|prefer not|not to answer|not listed|other|none)\b", re.IGNORECASE)
+STOPWORDS = {"a", "an", "and", "the", "of", "or", "in", "to", "for", "with", "on", "at", "by", "is", "i", "my"}
+
+
+def _normalize(text: str) -> str:
+    text = re.sub(r"[^\w\s]", " ", (text or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _tokens(text: str) -> list:
+    return [token for token in _normalize(text).split() if token not in STOPWORDS and not token.isdigit()]
+
+
+@lru_cache(maxsize=8)
+def build_context_index(context_text: str):
+    normalized = _normalize(context_text)
+    vocabulary = frozenset(_tokens(context_text))
+    # Bucket by prefix so fuzzy token matching only compares plausible neighbours.
+    buckets = {}
+    for token in vocabulary:
+        buckets.setdefault(token[:2], []).append(token)
+    return f" {normalized} ", vocabulary, buckets
+
+
+def _score_option(option: str, context_index) -> float:
+    padded_context, vocabulary, buckets = context_index
+    tokens = _tokens(option)
+    if not tokens:
+        return 0.0
+    phrase = _normalize(option)
+    if phrase and f" {phrase} " in padded_context:
+        return 2.0
+
+    score = 0.0
+    for token in tokens:
+        if token in vocabulary:
+            score += 1.0
+        elif len(token) >= 4 and difflib.get_close_matches(
+            token, buckets.get(token[:2], []), n=1, cutoff=FUZZY_TOKEN_CUTOFF
+        ):
+            score += 0.75
+    return score / len(tokens)
+
+
+def shortlist_options(options: list, context_index, top_k: int = DEFAULT_TOP_K) -> list:
+    scored = [(_score_option(option, context_index), position, option) for position, option in enumerate(options)]
+    ranked = sorted((item for item in scored if item[0] > 0), key=lambda item: (-item[0], item[1]))
+    keep = {position for _, position, _ in ranked[:top_k]}
+    keep.update(position for _, position, option in scored if FALLBACK_OPTION_RE.search(option))
+    # Preserve the form's original option order in the prompt.
+    return [option for position, option in enumerate(options) if position in keep]
+
+
+def prune_field_options(
+    fields: dict,
+    context_text: str,
+    threshold: int = DEFAULT_PRUNE_THRESHOLD,
+    top_k: int = DEFAULT_TOP_K,
+):
+    context_index = build_context_index(context_text)
+    pruned_fields = []
+    pruned_positions = []
+    options_before = 0
+    options_after = 0
+    for position, field in enumerate(fields.get("fields") or []):
+        options = field.get("options") or []
+        options_before += len(options)
+        if len(options) <= threshold:
+            options_after += len(options)
+            pruned_fields.append(field)
+            continue
+        shortlist = shortlist_options(options, context_index, top_k=top_k)
+        if not shortlist:
+            options_after += len(options)
+            pruned_fields.append(field)
+            continue
+        options_after += len(shortlist)
+        pruned_fields.append({**field, "options": shortlist})
+        pruned_positions.append(position)
+
+    stats = {
+        "pruned_fields": len(pruned_positions),
+        "options_before": options_before,
+        "options_after": options_after,
+    }
+    return {**fields, "fields": pruned_fields}, pruned_positions, stats
+
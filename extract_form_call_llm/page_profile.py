@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+from urllib.parse import urlparse
+
+
+# The DOM extractor needs markup, scripts (forms are often client-rendered),
+# XHR/fetch and stylesheets (visibility checks read computed styles).
+# Everything below is pure download and decode cost.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "texttrack", "manifest"})
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googleadservices.com",
+    "connect.facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "hotjar.io",
+    "clarity.ms",
+    "segment.com",
+    "segment.io",
+    "fullstory.com",
+    "mixpanel.com",
+    "amplitude.com",
+    "heap.io",
+    "heapanalytics.com",
+    "snap.licdn.com",
+    "ads.linkedin.com",
+    "bat.bing.com",
+    "nr-data.net",
+    "js-agent.newrelic.com",
+    "intercom.io",
+    "intercomcdn.com",
+    "onetrust.com",
+    "cookielaw.org",
+    "qualtrics.com",
+)
+# Smaller viewport means less layout and raster work; service workers would
+# otherwise bypass route interception.
+LEAN_CONTEXT_OPTIONS = {
+    "viewport": {"width": 1024, "height": 768},
+    "reduced_motion": "reduce",
+    "service_workers": "block",
+}
+DISABLE_ANIMATIONS_JS = r"""
+  (() => {
+    const css = "*, *::before, *::after { animation: none !important; transition: none !important; caret-color: auto !important; }";
+    const install = () => {
+      const style = document.createElement("style");
+      style.textContent = css;
+      (document.head || document.documentElement).appendChild(style);
+    };
+    if (document.readyState === "loading") document.addEventListener("DOMContentLoaded", install, { once: true });
+    else install();
+  })();
+"""
+
+
+def is_tracker(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return any(host == domain or host.endswith("." + domain) for domain in TRACKER_DOMAINS)
+
+
+class NetworkReport:
+    # Per-scan request accounting. Playwright's sync API delivers route and
+    # response callbacks on the page's own thread, so no locking is needed.
+    def __init__(self):
+        self.blocked = {}
+        self.loaded_requests = 0
+        self.loaded_bytes = 0
+
+    def route(self, route):
+        request = route.request
+        # Documents (the page itself, embedded form iframes) always load.
+        if request.resource_type == "document":
+            route.continue_()
+            return
+        reason = "tracker" if is_tracker(request.url) else request.resource_type
+        if reason == "tracker" or reason in BLOCKED_RESOURCE_TYPES:
+            self.blocked[reason] = self.blocked.get(reason, 0) + 1
+            route.abort("blockedbyclient")
+            return
+        route.continue_()
+
+    def response(self, response):
+        # Declared sizes only; reading bodies would cost a round trip each.
+        self.loaded_requests += 1
+        try:
+            self.loaded_bytes += int(response.headers.get("content-length") or 0)
+        except ValueError:
+            pass
+
+    def summary(self) -> dict:
+        return {
+            "requests_blocked": sum(self.blocked.values()),
+            "blocked_by_reason": dict(self.blocked),
+            "requests_loaded": self.loaded_requests,
+            "bytes_loaded": self.loaded_bytes,
+        }
+
+
+def apply_lean_profile(page) -> NetworkReport:
+    # Must run before navigation.
+    report = NetworkReport()
+    page.add_init_script(DISABLE_ANIMATIONS_JS)
+    page.route("**/*", report.route)
+    page.on("response", report.response)
+    return report
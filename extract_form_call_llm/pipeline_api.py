@@ -1,21 +1,538 @@
 #!/usr/bin/env python3
 import json
 import os
+import time
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from urllib.parse import urlparse
 from datetime import datetime
 
-from forms_extraction import extract_fields
-from llm_call import generate_fill_json, load_env
+from answer_memory import DEFAULT_MEMORY_PATH, DEFAULT_MIN_OBSERVATIONS, AnswerMemory
+from batch_runner import DEFAULT_LLM_WORKERS, BatchRunner, parse_batch_urls
+from browser_pool import DEFAULT_POOL_SIZE, DEFAULT_RECYCLE_AFTER, BrowserPool, background_tasks
+from context_store import ContextStore
+from fill_validation import check_value, closest_options, validate_entries
+from form_cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_MEMORY_ENTRIES,
+    DEFAULT_REFRESH_AFTER_SECONDS,
+    DEFAULT_TTL_SECONDS,
+    FormSchemaCache,
+    is_storable,
+    normalize_job_url,
+)
+from forms_extraction import READY_QUIET_MS, READY_TIMEOUT_MS, extract_fields
+from job_scheduler import (
+    DEFAULT_JOB_TTL_SECONDS,
+    DEFAULT_JOB_WORKERS,
+    DEFAULT_MAX_JOBS,
+    DEFAULT_MAX_PENDING,
+    JobScheduler,
+)
+from llm_cache import DEFAULT_CACHE_PATH as DEFAULT_LLM_CACHE_PATH
+from llm_cache import DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRIES, LLMResultCache, fill_cache_key
+from llm_call import (
+    PROMPT_VERSION,
+    empty_value,
+    filled_entry,
+    generate_fill_json,
+    merge_filled_fields,
+    resolve_field_encoding,
+    resolve_max_shards,
+    resolve_prompt_layout,
+    subset_fields,
+)
+from metrics import MetricsRegistry, RequestTiming, timed
+from option_pruning import DEFAULT_PRUNE_THRESHOLD, DEFAULT_TOP_K, prune_field_options
+from page_profile import LEAN_CONTEXT_OPTIONS
+from prefetch import DEFAULT_MAX_QUEUE as DEFAULT_PREFETCH_QUEUE
+from prefetch import Prefetcher, interactive
+from profile_prefill import prefill_values
+from single_flight import SingleFlight
 
 
 BASE_DIR = Path(__file__).resolve().parent
 ROOT_DIR = BASE_DIR.parent
-PROFILE_PATH = ROOT_DIR / "profile.txt"
-RESUME_PATH = ROOT_DIR / "resume.txt"
-ENV_PATH = ROOT_DIR / ".env"
-ENV_MAP = load_env(ENV_PATH)
+PROFILE_PATH = Path(os.getenv("PIPELINE_PROFILE_PATH", str(ROOT_DIR / "profile.txt")))
+RESUME_PATH = Path(os.getenv("PIPELINE_RESUME_PATH", str(ROOT_DIR / "resume.txt")))
+ENV_PATH = Path(os.getenv("PIPELINE_ENV_PATH", str(ROOT_DIR / ".env")))
+CONTEXT_STORE = ContextStore(PROFILE_PATH, RESUME_PATH, ENV_PATH)
+READY_QUIET = int(os.getenv("PIPELINE_READY_QUIET_MS", str(READY_QUIET_MS)))
+READY_TIMEOUT = int(os.getenv("PIPELINE_READY_TIMEOUT_MS", str(READY_TIMEOUT_MS)))
+PRUNE_THRESHOLD = int(os.getenv("PIPELINE_PRUNE_OPTIONS_OVER", str(DEFAULT_PRUNE_THRESHOLD)))
+PRUNE_TOP_K = int(os.getenv("PIPELINE_PRUNE_TOP_K", str(DEFAULT_TOP_K)))
+LEAN_PAGES = os.getenv("PIPELINE_LEAN_PAGES", "1") != "0"
+STATIC_EXTRACTION = os.getenv("PIPELINE_STATIC_EXTRACTION", "1") != "0"
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def reask_fields(fields: dict, llm_fields: dict, llm_indexes: list, invalid: list, entries: list) -> dict:
+    # The repair prompt reuses each field's pruned shortlist plus the options
+    # closest to the rejected answer, not the full option list.
+    items = fields.get("fields") or []
+    pruned = dict(zip(llm_indexes, llm_fields.get("fields") or []))
+    selected = []
+    for index in invalid:
+        field = pruned.get(index, items[index])
+        options = items[index].get("options") or []
+        if len(field.get("options") or []) < len(options):
+            keep = set(field["options"]) | set(closest_options(items[index], entries[index].get("value")))
+            field = {**field, "options": [option for option in options if option in keep]}
+        selected.append(field)
+    return {**fields, "field_count": len(selected), "fields": selected}
+
+
+def fill_fields(
+    server,
+    fields: dict,
+    context: dict,
+    bypass_cache: bool = False,
+    on_entry=None,
+    timing=None,
+    observe_answers: bool = True,
+):
+    items = fields.get("fields") or []
+    memory = getattr(server, "answer_memory", None)
+    profile_text = context["profile_text"]
+    resume_text = context["resume_text"]
+    with timed(timing, "prefill"):
+        local_values = prefill_values(items, context["profile_record"])
+        remembered = {}
+        if memory and not bypass_cache:
+            pending = [index for index in range(len(items)) if index not in local_values]
+            remembered = {
+                pending[position]: value
+                for position, value in memory.resolve([items[index] for index in pending], context["context_hash"]).items()
+            }
+            local_values.update(remembered)
+    llm_indexes = [index for index in range(len(items)) if index not in local_values]
+
+    emitted = set()
+
+    def add_usage(usage: dict | None):
+        for key, value in (usage or {}).items():
+            llm_usage[key] = llm_usage.get(key, 0) + (value or 0)
+
+    def emit(index: int, entry: dict):
+        if on_entry is None or index in emitted:
+            return
+        emitted.add(index)
+        on_entry(index, entry)
+
+    for index in sorted(local_values):
+        emit(index, filled_entry(items[index], local_values[index]))
+
+    llm_result = None
+    llm_usage = {}
+    llm_cache = None
+    llm_key = None
+    llm_cache_status = "skipped"
+    pruning_stats = None
+    if llm_indexes:
+        with timed(timing, "option_pruning"):
+            llm_fields, _, pruning_stats = prune_field_options(
+                subset_fields(fields, llm_indexes),
+                f"{profile_text}\n{resume_text}",
+                threshold=PRUNE_THRESHOLD,
+                top_k=PRUNE_TOP_K,
+            )
+        llm_cache = getattr(server, "llm_cache", None)
+        env_map = context["env_map"]
+        prompt_version = ":".join(
+            [
+                PROMPT_VERSION,
+                resolve_prompt_layout(env_map),
+                resolve_field_encoding(env_map),
+                f"shards={resolve_max_shards(env_map)}",
+            ]
+        )
+        llm_key = fill_cache_key(llm_fields, profile_text, resume_text, context["model"], prompt_version)
+        with timed(timing, "llm_cache"):
+            llm_result = llm_cache.get(llm_key) if llm_cache and not bypass_cache else None
+        llm_cache_status = "hit" if llm_result is not None else ("bypass" if bypass_cache else "miss")
+        if llm_result is None:
+            stream_entry = None
+            if on_entry is not None:
+                llm_index_by_id = {items[index].get("id"): index for index in llm_indexes if items[index].get("id")}
+                unnamed_indexes = iter([index for index in llm_indexes if not items[index].get("id")])
+
+                def stream_entry(entry: dict):
+                    index = llm_index_by_id.get(entry.get("id")) if entry.get("id") else next(unnamed_indexes, None)
+                    if index is None:
+                        return
+                    status, entry["value"] = check_value(items[index], entry.get("value"))
+                    # Invalid answers are held back until the repair pass has run.
+                    if status != "invalid":
+                        emit(index, entry)
+
+            with timed(timing, "llm"):
+                llm_result = generate_fill_json(
+                    llm_fields,
+                    profile_text,
+                    resume_text,
+                    env_map=context["env_map"],
+                    on_entry=stream_entry,
+                    context_block=context["context_block"],
+                    on_usage=add_usage,
+                    timing=timing,
+                )
+
+    result = merge_filled_fields(fields, local_values, llm_result, llm_indexes)
+    entries = result["filled_fields"]
+    # Checked against the full option lists, including fields the model only saw a shortlist of.
+    with timed(timing, "validate"):
+        invalid, repair_stats = validate_entries(items, entries, llm_indexes)
+    repair_stats.update({"reasked": 0, "fixed_by_reask": 0, "unresolved": 0})
+    if invalid and llm_cache_status in {"miss", "bypass"}:
+        repair_stats["reasked"] = len(invalid)
+        reask_subset = reask_fields(fields, llm_fields, llm_indexes, invalid, entries)
+        try:
+            with timed(timing, "llm_reask"):
+                reask_result = generate_fill_json(
+                    reask_subset,
+                    profile_text,
+                    resume_text,
+                    env_map=context["env_map"],
+                    context_block=context["context_block"],
+                    on_usage=add_usage,
+                    timing=timing,
+                )
+        except Exception as error:
+            print(f"Re-ask for {len(invalid)} invalid fields failed: {error}")
+        else:
+            reask_entries = merge_filled_fields(reask_subset, {}, reask_result, list(range(len(invalid))))
+            residual = []
+            for index, entry in zip(invalid, reask_entries["filled_fields"]):
+                status, value = check_value(items[index], entry.get("value"))
+                if status == "invalid":
+                    residual.append(index)
+                else:
+                    entries[index] = {**entry, "value": value}
+            repair_stats["fixed_by_reask"] = len(invalid) - len(residual)
+            invalid = residual
+    for index in invalid:
+        # Never hand the extension a value it can't fill.
+        entries[index]["value"] = empty_value(items[index])
+    repair_stats["unresolved"] = len(invalid)
+
+    if llm_cache and llm_cache_status in {"miss", "bypass"} and not invalid:
+        # Cache the repaired answers so hits skip the re-ask. Anything still
+        # invalid (including a failed re-ask) was blanked and stays uncached:
+        # hits never re-ask, so the blanks would stick until a bypass.
+        llm_cache.put(
+            llm_key,
+            {"url": result["url"], "field_count": len(llm_indexes), "filled_fields": [entries[i] for i in llm_indexes]},
+        )
+    if memory and observe_answers and llm_cache_status in {"miss", "bypass"}:
+        # Only fresh model answers count as observations; cache replays would inflate confidence.
+        for index in llm_indexes:
+            memory.observe(items[index], entries[index].get("value"), context["context_hash"])
+    for index, entry in enumerate(entries):
+        emit(index, entry)
+
+    fill_info = {
+        "llm_cache": llm_cache_status,
+        "prefilled": len(local_values) - len(remembered),
+        "option_pruning": pruning_stats,
+        "answer_memory": {"resolved_locally": len(remembered), "sent_to_llm": len(llm_indexes)},
+        "llm_usage": llm_usage or None,
+        "repair": repair_stats,
+    }
+    return result, fill_info
+
+
+def cache_report(form_cache_status: str, fill_info: dict) -> dict:
+    return {
+        "form_schema": form_cache_status,
+        "llm_result": fill_info["llm_cache"],
+        "answer_memory": fill_info["answer_memory"],
+        "prompt_tokens": fill_info["llm_usage"],
+        "repair": fill_info["repair"],
+    }
+
+
+def extract_for_pipeline(server, url: str, timing=None) -> dict:
+    return extract_fields(
+        url,
+        pool=getattr(server, "browser_pool", None),
+        quiet_ms=READY_QUIET,
+        timeout_ms=READY_TIMEOUT,
+        timing=timing,
+        lean=LEAN_PAGES,
+        static=STATIC_EXTRACTION,
+    )
+
+
+def extract_schema(server, url: str, timing=None) -> dict:
+    extracted = extract_for_pipeline(server, url, timing=timing)
+    record_extraction(server, extracted.get("readiness") or {})
+    return extracted
+
+
+def refresh_schema(server, cache_key: str, url: str) -> dict:
+    # Background refreshes share the extraction flight so a concurrent miss for
+    # the same form does not start a second browser scan.
+    extract_flight = getattr(server, "extract_flight", None)
+    with background_tasks():
+        if extract_flight is None:
+            return extract_schema(server, url)
+        return extract_flight.do(cache_key, lambda: extract_schema(server, url))[0]
+
+
+def load_fields(server, url: str, bypass_cache: bool = False, timing=None):
+    form_cache = getattr(server, "form_cache", None)
+    cache_key = normalize_job_url(url)
+    with timed(timing, "form_cache"):
+        fields = form_cache.get(cache_key) if form_cache and not bypass_cache else None
+    form_cache_status = "hit" if fields is not None else ("bypass" if bypass_cache else "miss")
+    readiness = None
+
+    if fields is None:
+
+        def extract_and_store():
+            extracted = extract_schema(server, url, timing=timing)
+            if form_cache and is_storable(extracted):
+                form_cache.store(cache_key, url, {k: v for k, v in extracted.items() if k != "readiness"})
+            return extracted
+
+        extract_flight = getattr(server, "extract_flight", None)
+        # Covers waiting on a coalesced extraction too; the browser stages only time the leader.
+        with timed(timing, "extract"):
+            if extract_flight is not None:
+                fields, shared = extract_flight.do(cache_key, extract_and_store)
+                form_cache_status = "coalesced" if shared else form_cache_status
+            else:
+                fields = extract_and_store()
+        readiness = fields.pop("readiness", None)
+    elif form_cache:
+        form_cache.schedule_refresh(cache_key, url, lambda refresh_url: refresh_schema(server, cache_key, refresh_url))
+    return fields, form_cache_status, readiness
+
+
+def record_extraction(server, readiness: dict):
+    metrics = getattr(server, "metrics", None)
+    if metrics is None:
+        return
+    if readiness.get("signal") == "static":
+        metrics.inc("pipeline_extractions_total", path="static")
+    else:
+        # The reason is a short code such as combobox_options or fetch_failed:HTTPError;
+        # remembered:<code> means the site fell back recently and the fetch was skipped.
+        metrics.inc("pipeline_extractions_total", path="browser", fallback=readiness.get("static_fallback", "disabled"))
+    network = readiness.get("network")
+    if not network:
+        return
+    metrics.inc("pipeline_page_requests_total", network["requests_blocked"], outcome="blocked")
+    metrics.inc("pipeline_page_requests_total", network["requests_loaded"], outcome="loaded")
+    metrics.inc("pipeline_page_bytes_loaded_total", network["bytes_loaded"])
+
+
+def read_context(timing=None) -> dict:
+    with timed(timing, "context_read"):
+        return CONTEXT_STORE.snapshot()
+
+
+def llm_error_status(error: Exception) -> int:
+    detail = str(error)
+    if isinstance(error, RuntimeError) and ("OPENAI_API_KEY" in detail or "OpenAI SDK import failed" in detail):
+        return 500
+    return 502
+
+
+def health_payload(server) -> dict:
+    resources = [
+        "browser_pool",
+        "form_cache",
+        "llm_cache",
+        "answer_memory",
+        "extract_flight",
+        "pipeline_flight",
+        "batch_runner",
+        "job_scheduler",
+        "prefetcher",
+    ]
+    payload = {"status": "ok", "context_store": CONTEXT_STORE.stats()}
+    for name in resources:
+        resource = getattr(server, name, None)
+        payload[name] = resource.stats() if resource else None
+    return payload
+
+
+class PipelineError(Exception):
+    def __init__(self, status: int, error: str, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.error = error
+        self.detail = detail
+
+    def payload(self) -> dict:
+        return {"error": self.error, "detail": self.detail}
+
+
+def pipeline_key(url: str, context: dict, bypass_cache: bool = False) -> tuple:
+    return (normalize_job_url(url), context["context_hash"], context["model"], bypass_cache)
+
+
+def prepare_pipeline(server, url: str, bypass_cache: bool = False, timing=None) -> tuple:
+    # Extraction half of a run: form fields plus the context they get filled from.
+    try:
+        fields, form_cache_status, readiness = load_fields(server, url, bypass_cache=bypass_cache, timing=timing)
+    except ValueError as error:
+        raise PipelineError(422, "invalid_url", str(error)) from error
+    except Exception as error:
+        raise PipelineError(422, "form_extraction_failed", str(error)) from error
+
+    try:
+        context = read_context(timing)
+    except OSError as error:
+        raise PipelineError(500, "context_read_failed", str(error)) from error
+
+    request_context = {
+        "url": url,
+        "form_cache": form_cache_status,
+        "readiness": readiness,
+        "field_count": int(fields.get("field_count") or 0),
+        "fields_count": len(fields.get("fields") or []),
+        "profile_chars": len(context["profile_text"]),
+        "resume_chars": len(context["resume_text"]),
+    }
+    print("context:")
+    print(json.dumps(request_context, indent=2, ensure_ascii=False))
+    return fields, form_cache_status, context
+
+
+def complete_pipeline(server, prepared: tuple, bypass_cache: bool = False, timing=None, on_entry=None) -> dict:
+    fields, form_cache_status, context = prepared
+    try:
+        result, fill_info = fill_fields(
+            server, fields, context, bypass_cache=bypass_cache, on_entry=on_entry, timing=timing
+        )
+    except Exception as error:
+        raise PipelineError(llm_error_status(error), "llm_failed", str(error)) from error
+
+    print("fill:")
+    print(json.dumps(fill_info, indent=2, ensure_ascii=False))
+    print("llm_response:")
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    result["cache"] = cache_report(form_cache_status, fill_info)
+    return result
+
+
+def run_pipeline(server, url: str, bypass_cache: bool = False, timing=None) -> dict:
+    prepared = prepare_pipeline(server, url, bypass_cache=bypass_cache, timing=timing)
+    return complete_pipeline(server, prepared, bypass_cache=bypass_cache, timing=timing)
+
+
+def batch_item_event(index: int, url: str, result: dict | None, error: Exception | None, timing) -> dict:
+    event = {"event": "item", "index": index, "url": url}
+    if error is None:
+        return {**event, "status": 200, "data": result, "timing": timing.header()}
+    if not isinstance(error, PipelineError):
+        error = PipelineError(500, "internal_error", str(error))
+    return {**event, "status": error.status, **error.payload(), "timing": timing.header()}
+
+
+def run_job(server, job) -> dict:
+    status, cache = 500, None
+    try:
+        with interactive(server):
+            job.stage = "extract"
+            prepared = prepare_pipeline(server, job.url, bypass_cache=job.bypass_cache, timing=job.timing)
+            job.field_count = len(prepared[0].get("fields") or [])
+            job.stage = "fill"
+
+            def on_entry(index: int, entry: dict):
+                job.filled += 1
+
+            result = complete_pipeline(
+                server, prepared, bypass_cache=job.bypass_cache, timing=job.timing, on_entry=on_entry
+            )
+        status, cache = 200, result["cache"]
+        return result
+    except PipelineError as error:
+        status = error.status
+        raise
+    finally:
+        server.metrics.record_request(job.timing, "job", status, cache)
+
+
+def submit_job(server, payload: dict) -> tuple:
+    # Shared by both servers; returns (status, payload, headers).
+    url = (payload.get("url") or "").strip()
+    if not url:
+        return 400, {"error": "bad_request", "detail": "Missing 'url' in request body."}, None
+    job = server.job_scheduler.submit(url, bool(payload.get("bypass_cache")), lambda job: run_job(server, job))
+    if job is None:
+        return 503, {"error": "overloaded", "detail": "Job queue is full."}, None
+    links = {"status_url": f"/jobs/{job.id}", "result_url": f"/jobs/{job.id}/result"}
+    return 202, {**job.status(), **links}, {"Location": links["status_url"]}
+
+
+def job_response(server, path: str) -> tuple:
+    # GET /jobs/{id} and GET /jobs/{id}/result; returns (status, payload).
+    parts = path.strip("/").split("/")
+    if len(parts) not in {2, 3} or (len(parts) == 3 and parts[2] != "result"):
+        return 404, {"error": "not_found"}
+    job = server.job_scheduler.get(parts[1])
+    if job is None:
+        return 404, {"error": "job_not_found", "detail": "Unknown or expired job id."}
+    if len(parts) == 2 or job.state in {"queued", "running"}:
+        # Asking for the result early just reports progress with 202.
+        return (200 if len(parts) == 2 else 202), job.status()
+    if job.state == "succeeded":
+        return 200, job.result
+    error = job.error if isinstance(job.error, PipelineError) else PipelineError(500, "internal_error", str(job.error))
+    return error.status, {**error.payload(), "job_id": job.id}
+
+
+def prefetch_url(server, url: str, fill: bool, checkpoint) -> str:
+    # Runs between checkpoints so interactive requests and cancellation win
+    # at every stage boundary. Returns the outcome counted in prefetch stats.
+    checkpoint()
+    with background_tasks():
+        fields, form_cache_status, _ = load_fields(server, url)
+    if not fill or not fields.get("fields"):
+        return "cached" if form_cache_status == "hit" else "extracted"
+    checkpoint()
+    # Speculative answers stay out of answer memory: observing them would change
+    # which fields the later real request sends to the model, and so its cache key.
+    _, fill_info = fill_fields(server, fields, read_context(), observe_answers=False)
+    return "cached" if fill_info["llm_cache"] in {"hit", "skipped"} else "filled"
+
+
+def submit_prefetch(server, payload: dict) -> tuple:
+    try:
+        urls = parse_batch_urls(payload)
+    except ValueError as error:
+        return 400, {"error": "bad_request", "detail": str(error)}
+    prefetcher = getattr(server, "prefetcher", None)
+    if prefetcher is None:
+        return 503, {"error": "prefetch_disabled", "detail": "Prefetch is turned off (PIPELINE_PREFETCH=0)."}
+    queued = prefetcher.enqueue(urls, fill=bool(payload.get("fill")), replace=payload.get("replace", True) is not False)
+    return 202, queued
+
+
+def cancel_prefetch(server) -> tuple:
+    prefetcher = getattr(server, "prefetcher", None)
+    return 200, {"cancelled": prefetcher.cancel() if prefetcher is not None else 0}
+
+
+def run_pipeline_coalesced(server, url: str, bypass_cache: bool = False, timing=None) -> dict:
+    pipeline_flight = getattr(server, "pipeline_flight", None)
+    if pipeline_flight is None:
+        return run_pipeline(server, url, bypass_cache=bypass_cache, timing=timing)
+    try:
+        key = pipeline_key(url, read_context(timing), bypass_cache=bypass_cache)
+    except OSError as error:
+        raise PipelineError(500, "context_read_failed", str(error)) from error
+    started = time.monotonic()
+    result, shared = pipeline_flight.do(key, lambda: run_pipeline(server, url, bypass_cache=bypass_cache, timing=timing))
+    if shared and timing is not None:
+        # Followers only see the wait; the stage breakdown belongs to the leader's request.
+        timing.add("coalesced_wait", time.monotonic() - started)
+    result["cache"]["coalesced"] = shared
+    return result
 
 
 class PipelineHandler(BaseHTTPRequestHandler):
@@ -23,17 +540,28 @@ class PipelineHandler(BaseHTTPRequestHandler):
         origin = os.getenv("PIPELINE_CORS_ORIGIN", "*")
         self.send_header("Access-Control-Allow-Origin", origin)
         self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.send_header("Access-Control-Allow-Methods", "POST, GET, OPTIONS")
+        self.send_header("Access-Control-Allow-Methods", "POST, GET, DELETE, OPTIONS")
+        self.send_header("Access-Control-Expose-Headers", "X-Pipeline-Timing, Location")
 
-    def _send_json(self, status_code: int, payload: dict):
+    def _send_json(self, status_code: int, payload: dict, headers: dict | None = None):
         body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._send_body(status_code, body, "application/json; charset=utf-8", headers)
+
+    def _send_body(self, status_code: int, body: bytes, content_type: str, headers: dict | None = None):
         self.send_response(status_code)
         self._cors_headers()
-        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Type", content_type)
         self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
         self.wfile.write(body)
 
+    def _send_timed(self, status_code: int, payload: dict, timing: RequestTiming, endpoint: str = "pipeline"):
+        with timing.span("response_write"):
+            self._send_json(status_code, payload, headers={"X-Pipeline-Timing": timing.header()})
+        self.server.metrics.record_request(timing, endpoint, status_code, payload.get("cache"))
+
     def _read_json(self) -> dict:
         content_length = int(self.headers.get("Content-Length", "0"))
         raw_body = self.rfile.read(content_length) if content_length > 0 else b"{}"
@@ -46,7 +574,10 @@ class PipelineHandler(BaseHTTPRequestHandler):
         return payload
 
     def do_OPTIONS(self):
-        if urlparse(self.path).path not in {"/pipeline", "/health"}:
+        path = urlparse(self.path).path
+        known = path in {"/pipeline", "/pipeline/batch", "/jobs", "/prefetch", "/health", "/metrics"}
+        known = known or path.startswith("/jobs/")
+        if not known:
             self.send_response(404)
             self._cors_headers()
             self.end_headers()
@@ -57,7 +588,8 @@ class PipelineHandler(BaseHTTPRequestHandler):
         self.end_headers()
 
     def do_POST(self):
-        if urlparse(self.path).path != "/pipeline":
+        path = urlparse(self.path).path
+        if path not in {"/pipeline", "/pipeline/batch", "/jobs", "/prefetch"}:
             self._send_json(404, {"error": "not_found"})
             return
 
@@ -66,63 +598,150 @@ class PipelineHandler(BaseHTTPRequestHandler):
         except ValueError as error:
             self._send_json(400, {"error": "bad_request", "detail": str(error)})
             return
+        if path == "/jobs":
+            self._send_json(*submit_job(self.server, payload))
+            return
+        if path == "/prefetch":
+            self._send_json(*submit_prefetch(self.server, payload))
+            return
+        with interactive(self.server):
+            self._run_interactive(path, payload)
+
+    def _run_interactive(self, path: str, payload: dict):
+        if path == "/pipeline/batch":
+            self._batch_pipeline(payload)
+            return
 
         url = (payload.get("url") or "").strip()
         if not url:
             self._send_json(400, {"error": "bad_request", "detail": "Missing 'url' in request body."})
             return
+        bypass_cache = bool(payload.get("bypass_cache"))
+        stream = bool(payload.get("stream"))
 
         started_at = datetime.utcnow().isoformat() + "Z"
         print("\n========== PIPELINE REQUEST ==========")
         print(f"time_utc: {started_at}")
         print(f"url: {url}")
 
+        timing = RequestTiming()
+        if stream:
+            self._stream_pipeline(url, bypass_cache, timing)
+            return
+
         try:
-            fields = extract_fields(url)
+            result = run_pipeline_coalesced(self.server, url, bypass_cache=bypass_cache, timing=timing)
+        except PipelineError as error:
+            self._send_timed(error.status, error.payload(), timing)
+            return
+
+        print("========== END PIPELINE ==========\n")
+        self._send_timed(200, result, timing)
+
+    def _write_event(self, payload: dict):
+        self.wfile.write((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def _batch_pipeline(self, payload: dict):
+        try:
+            urls = parse_batch_urls(payload)
         except ValueError as error:
-            self._send_json(422, {"error": "invalid_url", "detail": str(error)})
+            self._send_json(400, {"error": "bad_request", "detail": str(error)})
+            return
+        bypass_cache = bool(payload.get("bypass_cache"))
+        print(f"\n========== PIPELINE BATCH ({len(urls)} urls) ==========")
+
+        batch_timing = RequestTiming()
+        items = [{"url": url, "timing": RequestTiming()} for url in urls]
+        self.send_response(200)
+        self._cors_headers()
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self._write_event({"event": "batch", "count": len(items)})
+
+        def prepare(item: dict):
+            return prepare_pipeline(self.server, item["url"], bypass_cache=bypass_cache, timing=item["timing"])
+
+        def complete(item: dict, prepared: tuple):
+            return complete_pipeline(self.server, prepared, bypass_cache=bypass_cache, timing=item["timing"])
+
+        # Results go out in completion order; "index" ties each one back to its URL.
+        failed = 0
+        for index, result, error in self.server.batch_runner.run(items, prepare, complete):
+            item = items[index]
+            event = batch_item_event(index, item["url"], result, error, item["timing"])
+            failed += error is not None
+            cache = (result or {}).get("cache")
+            self.server.metrics.record_request(item["timing"], "pipeline_batch_item", event["status"], cache)
+            self._write_event(event)
+
+        self.server.metrics.inc("pipeline_requests_total", endpoint="pipeline_batch", status=200)
+        print("========== END PIPELINE BATCH ==========\n")
+        summary = {"count": len(items), "succeeded": len(items) - failed, "failed": failed}
+        self._write_event({"event": "done", **summary, "timing": batch_timing.header()})
+
+    def _stream_pipeline(self, url: str, bypass_cache: bool, timing: RequestTiming):
+        try:
+            fields, form_cache_status, _ = load_fields(self.server, url, bypass_cache=bypass_cache, timing=timing)
+        except ValueError as error:
+            self._send_timed(422, {"error": "invalid_url", "detail": str(error)}, timing, "pipeline_stream")
             return
         except Exception as error:
-            self._send_json(422, {"error": "form_extraction_failed", "detail": str(error)})
+            self._send_timed(422, {"error": "form_extraction_failed", "detail": str(error)}, timing, "pipeline_stream")
             return
 
         try:
-            profile_text = PROFILE_PATH.read_text(encoding="utf-8")
-            resume_text = RESUME_PATH.read_text(encoding="utf-8")
+            context = read_context(timing)
         except OSError as error:
-            self._send_json(500, {"error": "context_read_failed", "detail": str(error)})
+            self._send_timed(500, {"error": "context_read_failed", "detail": str(error)}, timing, "pipeline_stream")
             return
 
-        request_context = {
-            "url": url,
-            "field_count": int(fields.get("field_count") or 0),
-            "fields_count": len(fields.get("fields") or []),
-            "profile_chars": len(profile_text),
-            "resume_chars": len(resume_text),
-        }
-        print("context:")
-        print(json.dumps(request_context, indent=2, ensure_ascii=False))
+        # NDJSON over an HTTP/1.0 response: one event per line, the stream ends when the connection closes.
+        self.send_response(200)
+        self._cors_headers()
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self._write_event({"event": "fields", "data": fields})
+
+        def on_entry(index: int, entry: dict):
+            self._write_event({"event": "filled_field", "index": index, "data": entry})
 
         try:
-            result = generate_fill_json(fields, profile_text, resume_text, env_map=ENV_MAP)
-        except RuntimeError as error:
-            detail = str(error)
-            status = 500 if "OPENAI_API_KEY" in detail or "OpenAI SDK import failed" in detail else 502
-            self._send_json(status, {"error": "llm_failed", "detail": detail})
-            return
+            result, fill_info = fill_fields(
+                self.server, fields, context, bypass_cache=bypass_cache, on_entry=on_entry, timing=timing
+            )
         except Exception as error:
-            self._send_json(502, {"error": "llm_failed", "detail": str(error)})
+            self._write_event({"event": "error", "error": "llm_failed", "detail": str(error)})
+            self.server.metrics.record_request(timing, "pipeline_stream", llm_error_status(error))
             return
 
-        print("llm_response:")
-        print(json.dumps(result, indent=2, ensure_ascii=False))
-        print("========== END PIPELINE ==========\n")
+        print("fill:")
+        print(json.dumps(fill_info, indent=2, ensure_ascii=False))
+        print("========== END PIPELINE (stream) ==========\n")
 
-        self._send_json(200, result)
+        result["cache"] = cache_report(form_cache_status, fill_info)
+        # Headers went out with the first event, so the stage breakdown rides on the done event.
+        self._write_event({"event": "done", "data": result, "timing": timing.header()})
+        self.server.metrics.record_request(timing, "pipeline_stream", 200, result["cache"])
+
+    def do_DELETE(self):
+        if urlparse(self.path).path != "/prefetch":
+            self._send_json(404, {"error": "not_found"})
+            return
+        self._send_json(*cancel_prefetch(self.server))
 
     def do_GET(self):
+        if urlparse(self.path).path.startswith("/jobs/"):
+            self._send_json(*job_response(self.server, urlparse(self.path).path))
+            return
         if urlparse(self.path).path == "/health":
-            self._send_json(200, {"status": "ok"})
+            self._send_json(200, health_payload(self.server))
+            return
+        if urlparse(self.path).path == "/metrics":
+            body = self.server.metrics.render().encode("utf-8")
+            self._send_body(200, body, METRICS_CONTENT_TYPE)
             return
         self._send_json(404, {"error": "not_found"})
 
@@ -130,12 +749,117 @@ class PipelineHandler(BaseHTTPRequestHandler):
         return
 
 
+def start_browser_pool():
+    size = int(os.getenv("PIPELINE_BROWSERS", str(DEFAULT_POOL_SIZE)))
+    if size <= 0:
+        return None
+    recycle_after = int(os.getenv("PIPELINE_BROWSER_RECYCLE_AFTER", str(DEFAULT_RECYCLE_AFTER)))
+    try:
+        context_options = LEAN_CONTEXT_OPTIONS if LEAN_PAGES else None
+        return BrowserPool(size=size, recycle_after=recycle_after, context_options=context_options).start()
+    except Exception as error:
+        print(f"[browser-pool] disabled, falling back to per-request launch: {error}")
+        return None
+
+
+def start_form_cache():
+    if os.getenv("PIPELINE_FORM_CACHE", "1") == "0":
+        return None
+    return FormSchemaCache(
+        path=os.getenv("PIPELINE_FORM_CACHE_PATH", str(DEFAULT_CACHE_PATH)),
+        max_entries=int(os.getenv("PIPELINE_FORM_CACHE_ENTRIES", str(DEFAULT_MEMORY_ENTRIES))),
+        ttl_seconds=float(os.getenv("PIPELINE_FORM_CACHE_TTL", str(DEFAULT_TTL_SECONDS))),
+        refresh_after_seconds=float(os.getenv("PIPELINE_FORM_CACHE_REFRESH_AFTER", str(DEFAULT_REFRESH_AFTER_SECONDS))),
+    )
+
+
+def start_llm_cache():
+    if os.getenv("PIPELINE_LLM_CACHE", "1") == "0":
+        return None
+    return LLMResultCache(
+        path=os.getenv("PIPELINE_LLM_CACHE_PATH", str(DEFAULT_LLM_CACHE_PATH)),
+        max_entries=int(os.getenv("PIPELINE_LLM_CACHE_ENTRIES", str(DEFAULT_MAX_ENTRIES))),
+        max_bytes=int(os.getenv("PIPELINE_LLM_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES))),
+    )
+
+
+def start_answer_memory():
+    if os.getenv("PIPELINE_ANSWER_MEMORY", "1") == "0":
+        return None
+    return AnswerMemory(
+        path=os.getenv("PIPELINE_ANSWER_MEMORY_PATH", str(DEFAULT_MEMORY_PATH)),
+        min_observations=int(os.getenv("PIPELINE_ANSWER_MEMORY_MIN_SEEN", str(DEFAULT_MIN_OBSERVATIONS))),
+    )
+
+
+def start_batch_runner():
+    # Extraction workers beyond the pool size would only queue for a browser.
+    extract_workers = int(
+        os.getenv("PIPELINE_BATCH_EXTRACT_WORKERS", os.getenv("PIPELINE_BROWSERS", str(DEFAULT_POOL_SIZE)))
+    )
+    llm_workers = int(os.getenv("PIPELINE_BATCH_LLM_WORKERS", str(DEFAULT_LLM_WORKERS)))
+    return BatchRunner(extract_workers, llm_workers)
+
+
+def start_job_scheduler():
+    return JobScheduler(
+        workers=int(os.getenv("PIPELINE_JOB_WORKERS", str(DEFAULT_JOB_WORKERS))),
+        max_jobs=int(os.getenv("PIPELINE_JOB_RETAIN", str(DEFAULT_MAX_JOBS))),
+        max_pending=int(os.getenv("PIPELINE_JOB_QUEUE", str(DEFAULT_MAX_PENDING))),
+        ttl_seconds=float(os.getenv("PIPELINE_JOB_TTL", str(DEFAULT_JOB_TTL_SECONDS))),
+    )
+
+
+def start_prefetcher(server):
+    if os.getenv("PIPELINE_PREFETCH", "1") == "0":
+        return None
+    return Prefetcher(
+        lambda url, fill, checkpoint: prefetch_url(server, url, fill, checkpoint),
+        max_queue=int(os.getenv("PIPELINE_PREFETCH_QUEUE", str(DEFAULT_PREFETCH_QUEUE))),
+    )
+
+
+def attach_resources(server):
+    server.browser_pool = start_browser_pool()
+    server.form_cache = start_form_cache()
+    server.llm_cache = start_llm_cache()
+    server.answer_memory = start_answer_memory()
+    server.extract_flight = SingleFlight()
+    server.pipeline_flight = SingleFlight()
+    server.metrics = MetricsRegistry()
+    server.batch_runner = start_batch_runner()
+    server.job_scheduler = start_job_scheduler()
+    server.prefetcher = start_prefetcher(server)
+    return server
+
+
+def release_resources(server):
+    if getattr(server, "browser_pool", None):
+        server.browser_pool.shutdown()
+    if getattr(server, "batch_runner", None):
+        server.batch_runner.shutdown()
+    if getattr(server, "job_scheduler", None):
+        server.job_scheduler.shutdown()
+    if getattr(server, "prefetcher", None):
+        server.prefetcher.shutdown()
+
+
 def run_server():
     host = os.getenv("PIPELINE_HOST", "127.0.0.1")
     port = int(os.getenv("PIPELINE_PORT", "8877"))
+    if os.getenv("PIPELINE_SERVER_MODE", "threaded") == "async":
+        from async_server import run_async_server
+
+        run_async_server(host, port)
+        return
+
     server = ThreadingHTTPServer((host, port), PipelineHandler)
+    attach_resources(server)
     print(f"Pipeline API listening on http://{host}:{port}")
-    server.serve_forever()
+    try:
+        server.serve_forever()
+    finally:
+        release_resources(server)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+from form_cache import normalize_job_url
+
+
+DEFAULT_MAX_QUEUE = 50
+# Interactive requests tend to come in bursts (open posting, then fill), so
+# wait a moment after the last one before picking prefetch work back up.
+IDLE_GRACE_SECONDS = 0.5
+IDLE_POLL_SECONDS = 0.25
+
+
+class PrefetchCancelled(Exception):
+    pass
+
+
+class Prefetcher:
+    # Background cache warmer with a single worker. Work only starts while no
+    # interactive request is in flight, and every stage boundary is a
+    # checkpoint where cancellation and newly arrived requests take effect.
+    def __init__(self, run, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.run = run
+        self.max_queue = max(1, int(max_queue))
+        self.condition = threading.Condition()
+        self.pending = OrderedDict()
+        self.current = None
+        self.generation = 0
+        self.active = 0
+        self.last_active = 0.0
+        self.stopped = False
+        self.outcomes = {}
+        self.thread = threading.Thread(target=self._loop, name="prefetch", daemon=True)
+        self.thread.start()
+
+    @contextmanager
+    def interactive(self):
+        with self.condition:
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.active -= 1
+                self.last_active = time.monotonic()
+                self.condition.notify_all()
+
+    def enqueue(self, urls: list, fill: bool = False, replace: bool = True) -> dict:
+        # replace drops queued candidates from an earlier list, e.g. after the
+        # user moved on to another search page.
+        keys = [normalize_job_url(url) for url in urls]
+        with self.condition:
+            cancelled = 0
+            if replace:
+                # A scan already running for a URL that is still wanted keeps going.
+                cancelled = self._cancel_locked(keep_current=self.current is not None and self.current[0] in keys)
+            queued = 0
+            for key, url in zip(keys, urls):
+                if key in self.pending or (self.current is not None and self.current[0] == key):
+                    continue
+                if len(self.pending) >= self.max_queue:
+                    break
+                self.pending[key] = (url, fill)
+                queued += 1
+            self.condition.notify_all()
+            return {"queued": queued, "cancelled": cancelled, "pending": len(self.pending)}
+
+    def _cancel_locked(self, keep_current: bool = False) -> int:
+        cancelled = len(self.pending) + (1 if self.current is not None and not keep_current else 0)
+        self.pending.clear()
+        if not keep_current:
+            self.generation += 1
+        self._count("cancelled", cancelled)
+        return cancelled
+
+    def cancel(self) -> int:
+        with self.condition:
+            cancelled = self._cancel_locked()
+            self.condition.notify_all()
+            return cancelled
+
+    def checkpoint(self, generation: int):
+        # Blocks until the server has been idle for the grace period; raises if
+        # the work was cancelled meanwhile.
+        with self.condition:
+            while True:
+                if self.stopped or generation != self.generation:
+                    raise PrefetchCancelled()
+                idle_for = time.monotonic() - self.last_active
+                if not self.active and idle_for >= IDLE_GRACE_SECONDS:
+                    return
+                self.condition.wait(IDLE_POLL_SECONDS if self.active else IDLE_GRACE_SECONDS - idle_for)
+
+    def _count(self, outcome: str | None, amount: int = 1):
+        if outcome and amount:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + amount
+
+    def _loop(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                key, (url, fill) = self.pending.popitem(last=False)
+                self.current = (key, url)
+                generation = self.generation
+            try:
+                outcome = self.run(url, fill, lambda: self.checkpoint(generation))
+            except PrefetchCancelled:
+                outcome = None
+            except Exception as error:
+                print(f"[prefetch] {url} failed: {error}")
+                outcome = "failed"
+            with self.condition:
+                self.current = None
+                self._count(outcome)
+
+    def stats(self) -> dict:
+        with self.condition:
+            return {
+                "pending": len(self.pending),
+                "running": self.current[1] if self.current else None,
+                "interactive_active": self.active,
+                "outcomes": dict(self.outcomes),
+            }
+
+    def shutdown(self):
+        with self.condition:
+            self.stopped = True
+            self.pending.clear()
+            self.condition.notify_all()
+
+
+def interactive(server):
+    # Marks an interactive request so prefetch work backs off while it runs.
+    prefetcher = getattr(server, "prefetcher", None)
+    return prefetcher.interactive() if prefetcher is not None else nullcontext()
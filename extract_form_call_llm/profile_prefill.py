@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+import re
+from functools import lru_cache
+
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+URL_RE = re.compile(r"(?:https?://|www\.)[^\s;,)]+", re.IGNORECASE)
+SEGMENT_RE = re.compile(r"^\s*(first name|last name|email|phone|city|state|location)\s*:?\s*(.+?)\s*$", re.IGNORECASE)
+
+FIRST_NAME_LABELS = {"first name", "legal first name", "given name"}
+LAST_NAME_LABELS = {"last name", "legal last name", "family name", "surname"}
+EMAIL_LABELS = {"email", "email address", "e mail"}
+PHONE_LABELS = {"phone", "phone number", "mobile", "mobile phone", "mobile number", "cell phone"}
+LOCATION_LABELS = {"location", "location city", "city", "current location"}
+PORTFOLIO_HINTS = ("portfolio", "website", "personal site", "homepage")
+
+
+def _normalize(text: str) -> str:
+    text = re.sub(r"[^\w\s]", " ", (text or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _full_url(url: str) -> str:
+    url = url.rstrip(".")
+    return url if url.lower().startswith("http") else f"https://{url}"
+
+
+@lru_cache(maxsize=8)
+def parse_profile(profile_text: str) -> dict:
+    record = {}
+    for segment in re.split(r"[;\n]|,\s*(?=(?:City|State)\b)", profile_text):
+        match = SEGMENT_RE.match(segment)
+        if not match:
+            continue
+        key = match.group(1).lower().replace(" ", "_")
+        record.setdefault(key, match.group(2).strip())
+
+    email = EMAIL_RE.search(record.get("email") or profile_text)
+    record["email"] = email.group(0) if email else None
+    phone = PHONE_RE.search(record.get("phone") or "") or PHONE_RE.search(profile_text)
+    record["phone"] = phone.group(0).strip() if phone else None
+
+    for url in URL_RE.findall(profile_text):
+        host = url.lower()
+        if "linkedin.com" in host:
+            record.setdefault("linkedin", _full_url(url))
+        elif "github.com" in host:
+            record.setdefault("github", _full_url(url))
+        else:
+            record.setdefault("portfolio", _full_url(url))
+
+    country = record.pop("location", None)
+    city = record.pop("city", None)
+    state = record.pop("state", None)
+    record["location"] = ", ".join(part for part in [city, state] if part) or country
+    return {key: value for key, value in record.items() if value}
+
+
+def _match_key(field: dict) -> str | None:
+    label = _normalize(field.get("question"))
+    identifiers = {_normalize(field.get("id")), _normalize(field.get("name"))} - {""}
+    signature = " ".join([label, *identifiers])
+    field_type = field.get("field_type")
+
+    if field.get("expects_url") or field_type == "url":
+        if "linkedin" in signature:
+            return "linkedin"
+        if "github" in signature:
+            return "github"
+        if any(hint in signature for hint in PORTFOLIO_HINTS):
+            return "portfolio"
+        return None
+    if field_type == "email" or label in EMAIL_LABELS or identifiers & {"email", "email address"}:
+        return "email"
+    if field_type == "tel" or label in PHONE_LABELS or identifiers & {"phone", "phone number"}:
+        return "phone"
+    if label in FIRST_NAME_LABELS or identifiers & {"first name", "first_name"}:
+        return "first_name"
+    if label in LAST_NAME_LABELS or identifiers & {"last name", "last_name"}:
+        return "last_name"
+    if label in LOCATION_LABELS or identifiers & {"candidate location", "location"}:
+        # Comboboxes with a known option list must match an option; leave those to the model.
+        if field_type == "select" and field.get("options"):
+            return None
+        return "location"
+    return None
+
+
+def prefill_values(fields: list, record: dict) -> dict:
+    values = {}
+    for index, field in enumerate(fields):
+        if field.get("field_type") not in {"text", "email", "tel", "url", "select"}:
+            continue
+        key = _match_key(field)
+        if key and record.get(key):
+            values[index] = record[key]
+    return values
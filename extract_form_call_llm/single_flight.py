@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import copy
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    # Coalesces concurrent calls with the same key: the first caller (leader)
+    # does the work, followers wait on the leader's future. Everyone receives a
+    # deep copy so callers can annotate their result without racing each other.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def claim(self, key):
+        with self.lock:
+            future = self.inflight.get(key)
+            if future is not None:
+                self.followers += 1
+                return future, False
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self.inflight[key] = future
+            self.leaders += 1
+            return future, True
+
+    def finish(self, key, future: Future, result=None, error: BaseException | None = None):
+        with self.lock:
+            if self.inflight.get(key) is future:
+                del self.inflight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        future, leader = self.claim(key)
+        if leader:
+            try:
+                result = fn()
+            except BaseException as error:
+                self.finish(key, future, error=error)
+                raise
+            self.finish(key, future, result)
+        return copy.deepcopy(future.result()), not leader
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"inflight": len(self.inflight), "leaders": self.leaders, "followers": self.followers}
@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+import codecs
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+from html.parser import HTMLParser
+
+from metrics import timed
+
+
+# Every second spent here is added to pages that end up on the browser path.
+FETCH_TIMEOUT_SECONDS = 4
+FALLBACK_MEMORY_SECONDS = 15 * 60
+MAX_REMEMBERED_FALLBACKS = 1024
+FETCH_CHUNK_BYTES = 64 * 1024
+MAX_HTML_BYTES = 5 * 1024 * 1024
+USER_AGENT = "Mozilla/5.0 (form-static-extract)"
+URL_FIELD_HINTS = re.compile(r"(linkedin|github|portfolio|website|homepage|personal\s*site|profile\s*url|^url$)", re.I)
+SKIPPED_INPUT_TYPES = {"hidden", "button", "submit", "reset", "image"}
+VOID_TAGS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+)
+# Content the browser never turns into DOM nodes while scripting is on.
+INERT_TAGS = frozenset({"template", "noscript"})
+# Start tags that implicitly close the open element, the way the HTML parser does.
+IMPLIED_END = {
+    "option": {"option"},
+    "optgroup": {"option", "optgroup"},
+    "li": {"li"},
+    "dt": {"dt", "dd"},
+    "dd": {"dt", "dd"},
+    "p": {"p"},
+    "div": {"p"},
+    "fieldset": {"p"},
+    "form": {"p"},
+    "ul": {"p"},
+    "ol": {"p"},
+    "table": {"p"},
+    "h3": {"p"},
+    "h4": {"p"},
+}
+LABEL_FALLBACK_TAGS = ("label", "legend", "h3", "h4", "p")
+# Utility classes that hide elements in common CSS frameworks; linked
+# stylesheets are not fetched, so these stand in for them.
+HIDDEN_CLASSES = frozenset({"hidden", "is-hidden", "d-none", "hide", "invisible", "display-none"})
+SIMPLE_SELECTOR = re.compile(r"^([.#])(-?[_a-zA-Z][\w-]*)$")
+
+
+class StaticExtractionIncomplete(Exception):
+    # Raised with a short reason when the browser path has to take over.
+    pass
+
+
+def _clean(value) -> str:
+    return re.sub(r"\s+", " ", value or "").strip()
+
+
+class _Element:
+    __slots__ = ("tag", "attrs", "parent", "children")
+
+    def __init__(self, tag: str, attrs: dict, parent):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []
+
+    def get(self, name: str) -> str | None:
+        return self.attrs.get(name)
+
+    def text(self) -> str:
+        parts = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                parts.append(node)
+            else:
+                stack.extend(reversed(node.children))
+        return "".join(parts)
+
+    def closest(self, tag: str):
+        node = self
+        while node is not None and node.tag != tag:
+            node = node.parent
+        return node
+
+    def iter(self):
+        # Descendants in document order, like querySelectorAll.
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                continue
+            yield node
+            stack.extend(reversed(node.children))
+
+    def find(self, tags: tuple):
+        return next((node for node in self.iter() if node.tag in tags), None)
+
+
+class _DomBuilder(HTMLParser):
+    # Just enough of the HTML tree-building rules to answer the extractor's
+    # closest(), label[for] and getElementById lookups.
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Element("#document", {}, None)
+        self.stack = [self.root]
+        self.by_id = {}
+        self.forms = []
+        self.inert_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in INERT_TAGS:
+            self.inert_depth += 1
+        if self.inert_depth:
+            return
+        if tag == "form" and any(node.tag == "form" for node in self.stack):
+            return
+        closes = IMPLIED_END.get(tag)
+        if closes and self.stack[-1].tag in closes:
+            self.stack.pop()
+        attr_map = {}
+        for name, value in attrs:
+            attr_map.setdefault(name, value if value is not None else "")
+        parent = self.stack[-1]
+        element = _Element(tag, attr_map, parent)
+        parent.children.append(element)
+        element_id = attr_map.get("id")
+        if element_id:
+            self.by_id.setdefault(element_id, element)
+        if tag == "form":
+            self.forms.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and not self.inert_depth and self.stack[-1].tag == tag:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        if tag in INERT_TAGS:
+            self.inert_depth = max(0, self.inert_depth - 1)
+            return
+        if self.inert_depth:
+            return
+        for position in range(len(self.stack) - 1, 0, -1):
+            if self.stack[position].tag == tag:
+                del self.stack[position:]
+                return
+
+    def handle_data(self, data):
+        if not self.inert_depth:
+            self.stack[-1].children.append(data)
+
+
+def _declarations(text: str) -> dict:
+    declarations = {}
+    for declaration in (text or "").split(";"):
+        name, _, value = declaration.partition(":")
+        if value:
+            declarations[name.strip().lower()] = value.replace("!important", "").strip().lower()
+    return declarations
+
+
+def _style(element: _Element) -> dict:
+    return _declarations(element.get("style"))
+
+
+def _hides(declarations: dict) -> bool:
+    try:
+        transparent = float(declarations.get("opacity", "1")) == 0
+    except ValueError:
+        transparent = False
+    return (
+        transparent
+        or declarations.get("display") == "none"
+        or declarations.get("visibility") in {"hidden", "collapse"}
+    )
+
+
+def _css_rules(css: str):
+    # Yields (selector, body, nested) for each style rule; at-rule blocks
+    # such as @media only mark the rules inside them as nested.
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    preludes = []
+    start = 0
+    for position, char in enumerate(css):
+        if char == "{":
+            preludes.append(css[start:position].strip())
+            start = position + 1
+        elif char == "}":
+            if preludes:
+                prelude = preludes.pop()
+                if not prelude.startswith("@"):
+                    yield prelude, css[start:position], bool(preludes)
+            start = position + 1
+
+
+def _hiding_selectors(builder) -> tuple | None:
+    # Classes and ids hidden by the page's own <style> rules, or None when a
+    # rule hides something by a selector this module cannot match.
+    hidden_classes = set(HIDDEN_CLASSES)
+    hidden_ids = set()
+    for node in builder.root.iter():
+        if node.tag != "style":
+            continue
+        for selectors, body, nested in _css_rules(node.text()):
+            if not _hides(_declarations(body)):
+                continue
+            if nested:
+                return None
+            for selector in selectors.split(","):
+                selector = selector.strip()
+                if selector == "[hidden]":
+                    continue
+                match = SIMPLE_SELECTOR.match(selector)
+                if match is None:
+                    return None
+                (hidden_classes if match.group(1) == "." else hidden_ids).add(match.group(2))
+    return frozenset(hidden_classes), frozenset(hidden_ids)
+
+
+def _is_visible(element: _Element, hidden_classes=HIDDEN_CLASSES, hidden_ids=frozenset()) -> bool:
+    # Inline styles, the hidden attribute and known hiding classes or ids;
+    # anything subtler needs the browser's computed style.
+    if element.get("disabled") is not None:
+        return False
+    style = _style(element)
+    try:
+        if float(style.get("opacity", "1")) == 0:
+            return False
+    except ValueError:
+        pass
+    visibility = style.get("visibility")
+    node = element
+    while node is not None and node.tag != "#document":
+        node_style = style if node is element else _style(node)
+        if node.get("hidden") is not None or node_style.get("display") == "none":
+            return False
+        if node.get("id") in hidden_ids or not hidden_classes.isdisjoint((node.get("class") or "").split()):
+            return False
+        if visibility is None:
+            visibility = node_style.get("visibility")
+        node = node.parent
+    return visibility not in {"hidden", "collapse"}
+
+
+class _FormReader:
+    # Python port of EXTRACTOR_JS over the parsed tree; keep the two in step.
+    def __init__(self, builder: _DomBuilder, form: _Element, hidden: tuple = (HIDDEN_CLASSES, frozenset())):
+        self.by_id = builder.by_id
+        self.hidden_classes, self.hidden_ids = hidden
+        self.form = form
+        self.labels_for = {}
+        self.controls = []
+        for node in form.iter():
+            if node.tag == "label" and node.get("for"):
+                self.labels_for.setdefault(node.get("for"), node)
+            elif node.tag in {"input", "select", "textarea"}:
+                self.controls.append(node)
+
+    def visible(self, element: _Element) -> bool:
+        return _is_visible(element, self.hidden_classes, self.hidden_ids)
+
+    def label(self, element: _Element) -> str:
+        aria_label = _clean(element.get("aria-label"))
+        if aria_label:
+            return aria_label
+
+        labelled_by = element.get("aria-labelledby")
+        if labelled_by:
+            texts = [_clean(self.by_id[ref].text()) for ref in labelled_by.split() if ref in self.by_id]
+            texts = [text for text in texts if text]
+            if texts:
+                return " ".join(texts)
+
+        element_id = element.get("id")
+        if element_id and element_id in self.labels_for:
+            text = _clean(self.labels_for[element_id].text())
+            if text:
+                return text
+
+        wrapped = element.closest("label")
+        if wrapped is not None:
+            text = _clean(wrapped.text())
+            if text:
+                return text
+
+        fieldset = element.closest("fieldset")
+        if fieldset is not None:
+            legend = fieldset.find(("legend",))
+            if legend is not None:
+                text = _clean(legend.text())
+                if text:
+                    return text
+
+        question = element.closest("div")
+        if question is not None:
+            explicit = question.find(LABEL_FALLBACK_TAGS)
+            if explicit is not None:
+                text = _clean(explicit.text())
+                if text:
+                    return text
+
+        return _clean(element.get("placeholder")) or _clean(element.get("name")) or _clean(element_id)
+
+    @staticmethod
+    def expects_url(element: _Element, label_text: str) -> bool:
+        if (element.get("type") or "").lower() == "url" or (element.get("inputmode") or "").lower() == "url":
+            return True
+        signature = " ".join(
+            part
+            for part in (
+                label_text,
+                _clean(element.get("placeholder")),
+                _clean(element.get("name")),
+                _clean(element.get("id")),
+                _clean(element.get("autocomplete")),
+            )
+            if part
+        )
+        return bool(URL_FIELD_HINTS.search(signature))
+
+    @staticmethod
+    def _options(select: _Element) -> list:
+        return [node for node in select.iter() if node.tag == "option"]
+
+    @staticmethod
+    def _option_value(option: _Element) -> str:
+        value = option.get("value")
+        return value if value is not None else _clean(option.text())
+
+    @staticmethod
+    def _checked_value(element: _Element) -> str:
+        value = element.get("value")
+        return _clean(value if value is not None else "on")
+
+    def select_value(self, select: _Element):
+        options = self._options(select)
+        selected = [option for option in options if option.get("selected") is not None]
+        if select.get("multiple") is not None:
+            return [_clean(option.text() or self._option_value(option)) for option in selected]
+        if selected:
+            return _clean(self._option_value(selected[-1]))
+        return _clean(self._option_value(options[0])) if options else ""
+
+    def combobox_options(self, element: _Element) -> list:
+        # Options only count if the listbox already ships them in the markup;
+        # the browser path opens the widget to render them otherwise.
+        listbox = self.by_id.get(element.get("aria-controls") or "")
+        options = []
+        if listbox is not None:
+            for node in listbox.iter():
+                if node.get("role") == "option" and self.visible(node):
+                    text = _clean(node.text())
+                    if text and text not in options:
+                        options.append(text)
+        return options
+
+    def group(self, element: _Element, input_type: str, name: str) -> dict:
+        nodes = [
+            node
+            for node in self.controls
+            if node.tag == "input"
+            and (node.get("type") or "").lower() == input_type
+            and node.get("name") == name
+            and self.visible(node)
+        ]
+        options = [self.label(node) or self._checked_value(node) for node in nodes]
+        checked = [node for node in nodes if node.get("checked") is not None]
+        if input_type == "radio":
+            current_value = (self.label(checked[0]) or self._checked_value(checked[0])) if checked else None
+        else:
+            current_value = [self.label(node) or self._checked_value(node) for node in checked]
+        return {
+            "question": self.label(element),
+            "field_type": f"{input_type}_group",
+            "required": any(
+                node.get("required") is not None or node.get("aria-required") == "true" for node in nodes
+            ),
+            "options": [option for option in options if option],
+            "current_value": current_value,
+            "name": name or None,
+            "id": element.get("id") or None,
+        }
+
+    def fields(self) -> list:
+        fields = []
+        seen_groups = set()
+        for element in self.controls:
+            tag = element.tag
+            input_type = (element.get("type") or "text").lower()
+            role = (element.get("role") or "").lower()
+            is_combobox = role == "combobox" or "select__input" in (element.get("class") or "").split()
+
+            if tag == "input" and input_type in SKIPPED_INPUT_TYPES:
+                continue
+            if not self.visible(element):
+                continue
+
+            name = element.get("name") or ""
+            if input_type in {"radio", "checkbox"} and name:
+                group_key = f"{input_type}:{name}"
+                if group_key in seen_groups:
+                    continue
+                seen_groups.add(group_key)
+                fields.append(self.group(element, input_type, name))
+                continue
+
+            options = []
+            if tag == "select":
+                options = [_clean(option.text() or self._option_value(option)) for option in self._options(element)]
+                options = [option for option in options if option]
+            label_text = self.label(element)
+            expects_url = self.expects_url(element, label_text)
+            if tag == "input":
+                field_type = "select" if is_combobox else ("url" if expects_url else input_type)
+            else:
+                field_type = tag
+            if field_type == "select" and is_combobox:
+                options = self.combobox_options(element)
+
+            if tag == "select":
+                current_value = self.select_value(element)
+            elif tag == "textarea":
+                current_value = _clean(element.text())
+            elif input_type == "checkbox":
+                current_value = element.get("checked") is not None
+            else:
+                current_value = _clean(element.get("value"))
+
+            fields.append(
+                {
+                    "question": label_text,
+                    "field_type": field_type,
+                    "required": element.get("required") is not None or element.get("aria-required") == "true",
+                    "options": options,
+                    "current_value": current_value,
+                    "name": name or None,
+                    "id": element.get("id") or None,
+                    "role": role or None,
+                    "is_combobox": is_combobox,
+                    "expects_url": expects_url,
+                }
+            )
+        return fields
+
+
+def parse_html(chunks) -> _DomBuilder:
+    builder = _DomBuilder()
+    for chunk in chunks:
+        builder.feed(chunk)
+    builder.close()
+    return builder
+
+
+def extract_from_html(html, url: str) -> dict:
+    # Same result shape as EXTRACTOR_JS. html may be a string or an iterable of
+    # decoded chunks.
+    builder = parse_html([html] if isinstance(html, str) else html)
+    if not builder.forms:
+        return {"url": url, "field_count": 0, "fields": [], "error": "form_not_found"}
+    hidden = _hiding_selectors(builder)
+    if hidden is None:
+        return {"url": url, "field_count": 0, "fields": [], "error": "stylesheet_visibility"}
+    fields = _FormReader(builder, builder.forms[0], hidden).fields()
+    return {"url": url, "field_count": len(fields), "fields": fields}
+
+
+def incomplete_reason(result: dict) -> str | None:
+    if result.get("error"):
+        return result["error"]
+    if not result.get("fields"):
+        return "no_fields"
+    if any(field.get("is_combobox") and not field.get("options") for field in result["fields"]):
+        return "combobox_options"
+    return None
+
+
+def _read_chunks(response):
+    # Decodes as bytes arrive so parsing overlaps the download.
+    charset = response.headers.get_content_charset() or "utf-8"
+    decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+    received = 0
+    while True:
+        data = response.read(FETCH_CHUNK_BYTES)
+        if not data:
+            break
+        received += len(data)
+        if received > MAX_HTML_BYTES:
+            raise StaticExtractionIncomplete("too_large")
+        yield decoder.decode(data)
+    yield decoder.decode(b"", final=True)
+
+
+_fallbacks = {}
+_fallbacks_lock = threading.Lock()
+
+
+def _site_key(url: str) -> str:
+    # Host plus first path segment, so one company's client-rendered form on a
+    # multi-tenant job board does not turn the static path off for the rest.
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.hostname or ''}/{parts.path.strip('/').split('/', 1)[0]}"
+
+
+def _remembered_fallback(site: str) -> str | None:
+    with _fallbacks_lock:
+        entry = _fallbacks.get(site)
+        if entry is None:
+            return None
+        expires_at, reason = entry
+        if expires_at <= time.monotonic():
+            del _fallbacks[site]
+            return None
+        return reason
+
+
+def _remember_fallback(site: str, reason: str):
+    with _fallbacks_lock:
+        _fallbacks.pop(site, None)
+        _fallbacks[site] = (time.monotonic() + FALLBACK_MEMORY_SECONDS, reason)
+        while len(_fallbacks) > MAX_REMEMBERED_FALLBACKS:
+            del _fallbacks[next(iter(_fallbacks))]
+
+
+def extract_static(url: str, timing=None) -> dict:
+    # Fetches and parses the page without a browser. Raises
+    # StaticExtractionIncomplete when the markup alone cannot produce the same
+    # schema the browser would (client-rendered forms, unhydrated comboboxes,
+    # visibility driven by stylesheet rules it cannot match). Sites that fell
+    # back recently skip the fetch and go straight to the browser.
+    site = _site_key(url)
+    remembered = _remembered_fallback(site)
+    if remembered is not None:
+        raise StaticExtractionIncomplete(f"remembered:{remembered}")
+    try:
+        return _fetch_and_extract(url, timing)
+    except StaticExtractionIncomplete as incomplete:
+        _remember_fallback(site, str(incomplete))
+        raise
+
+
+def _fetch_and_extract(url: str, timing=None) -> dict:
+    started = time.monotonic()
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, "Accept": "text/html"})
+    with timed(timing, "static_extract"):
+        try:
+            with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT_SECONDS) as response:
+                content_type = response.headers.get_content_type()
+                if content_type not in {"text/html", "application/xhtml+xml"}:
+                    raise StaticExtractionIncomplete(f"content_type:{content_type}")
+                result = extract_from_html(_read_chunks(response), response.geturl())
+        except StaticExtractionIncomplete:
+            raise
+        except Exception as error:
+            raise StaticExtractionIncomplete(f"fetch_failed:{type(error).__name__}")
+
+    reason = incomplete_reason(result)
+    if reason:
+        raise StaticExtractionIncomplete(reason)
+    result["readiness"] = {
+        "signal": "static",
+        "elapsed_ms": round((time.monotonic() - started) * 1000),
+    }
+    return result